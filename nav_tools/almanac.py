@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:12:41 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Nautical almanac tables with interpolation!
+"""
+
+import numpy as np
+
+# Almanac data interpolated in time
+almanac_keys = ['gha', 'dec', 'hp', 'sd']
+
+
+class NauticalAlmanac:
+    def __init__(self,cd=None,file_name=None):
+
+        self.cd = cd    # CelestialData object, needed only to build tables
+
+        self.jd0 = 0.0  # first table epoch [UT1 julian date]
+        self.step = 0.0 # table step [days]
+        self.names = [] # solar objects in the table
+        self.tab = {}   # tables of almanac data, GHA is continuous (unwrapped)
+
+        if file_name != None:
+            self.load(file_name)
+
+# **********************
+# *** Public methods ***
+# **********************
+
+    # Builds almanac tables for solar objects and Aries
+    # date0, date1: date range in list format [yyyy,mm,dd], date1 included
+    # step: table step in hours
+    def build(self, date0, date1, step=1.0):
+
+        if self.cd == None:
+            print('  ERROR: CelestialData object is needed to build almanac tables!')
+            raise AssertionError()
+
+        jd0 = self.julian_date(list(date0) + [0,0,0])
+        jd1 = self.julian_date(list(date1) + [24,0,0])
+        nn = int(round((jd1 - jd0) * 24.0 / step)) + 1
+
+        self.jd0 = jd0
+        self.step = step / 24.0
+        self.names = list(self.cd.solar)
+
+        jd = jd0 + np.arange(nn) * self.step
+        utc = self.cd.ts.ut1_jd(jd)
+
+        self.tab = {}
+        for name in self.names:
+            data = self.cd.get_celestial_data_series(name, utc)
+            for k in almanac_keys:
+                self.tab[name + '_' + k] = data[k]
+            self.tab[name + '_gha'] = self.unwrap(data['gha'])
+
+        self.tab['aries_gha'] = self.unwrap(data['gha_a'])
+
+        return self
+
+    # Saves almanac tables in a compact numpy binary file
+    def save(self, file_name):
+
+        np.savez_compressed(file_name, jd0=self.jd0, step=self.step,
+                            names=np.array(self.names), **self.tab)
+
+    # Loads almanac tables from numpy binary file
+    def load(self, file_name):
+
+        with np.load(file_name) as f:
+            self.jd0 = float(f['jd0'])
+            self.step = float(f['step'])
+            self.names = [str(n) for n in f['names']]
+            self.tab = {}
+            for k in f.files:
+                if not(k in ['jd0', 'step', 'names']):
+                    self.tab[k] = f[k]
+
+        return self
+
+    # name: solar object name or 'aries'
+    # t: time must be in list format [yyyy,mm,dd,HH,MM,SS] (UT1)
+    # order: 1 - linear interpolation, 3 - cubic (Lagrange) interpolation
+    # returns almanac data in dictionary
+    def get_data(self, name, t, order=1):
+
+        data = self.get_data_jd(name, self.julian_date(t), order)
+
+        for k in data.keys():
+            data[k] = float(data[k])
+
+        return data
+
+    # name: solar object name or 'aries'
+    # jd: UT1 julian dates (scalar or numpy array)
+    # order: 1 - linear interpolation, 3 - cubic (Lagrange) interpolation
+    # returns almanac data in dictionary of numpy arrays
+    # Interpolation error of hourly tables (worst case is the Moon):
+    #   linear: GHA, Dec < 0.05' (other objects < 0.001'), HP, SD < 0.001'
+    #   cubic:  GHA, Dec, HP, SD < 0.001'
+    # Error grows with the square (linear) or fourth power (cubic) of the step
+    def get_data_jd(self, name, jd, order=1):
+
+        if name == 'aries':
+            keys = ['gha']
+        elif name in self.names:
+            keys = almanac_keys
+        else:
+            print('  ERROR: Object {:} is not in the almanac tables!'.format(name))
+            raise AssertionError()
+
+        x = (np.asarray(jd, dtype=float) - self.jd0) / self.step
+        nn = len(self.tab[name + '_' + keys[0]])
+        if np.any(x < 0) or np.any(x > nn - 1):
+            print('  ERROR: Time is out of the almanac tables range!')
+            raise AssertionError()
+
+        data = {}
+        for k in keys:
+            data[k] = self.interpolate(self.tab[name + '_' + k], x, order)
+        data['gha'] = np.mod(data['gha'], 360.0)
+
+        return data
+
+
+# ***************************
+# **** Private functions ****
+# ***************************
+
+    # Interpolates table y in fractional table index x
+    def interpolate(self, y, x, order):
+
+        nn = len(y)
+
+        if order == 1:
+            i = np.clip(np.floor(x).astype(int), 0, nn - 2)
+            f = x - i
+            return y[i] + f * (y[i+1] - y[i])
+        elif order == 3:
+            # four point Lagrange interpolation on points i-1, i, i+1, i+2
+            i = np.clip(np.floor(x).astype(int), 1, nn - 3)
+            f = x - i
+            l0 = -f * (f - 1.0) * (f - 2.0) / 6.0
+            l1 = (f + 1.0) * (f - 1.0) * (f - 2.0) / 2.0
+            l2 = -(f + 1.0) * f * (f - 2.0) / 2.0
+            l3 = (f + 1.0) * f * (f - 1.0) / 6.0
+            return l0*y[i-1] + l1*y[i] + l2*y[i+1] + l3*y[i+2]
+        else:
+            print('  ERROR: Interpolation order {:} is not supported!'.format(order))
+            raise AssertionError()
+
+    # Converts GHA in degrees [0,360) to continuous angle
+    def unwrap(self, gha):
+
+        return np.degrees(np.unwrap(np.radians(gha)))
+
+    # Converts time(s) in list format [yyyy,mm,dd,HH,MM,SS] to julian date
+    # Gregorian calendar, time can be list or numpy array (N,6)
+    def julian_date(self, t):
+
+        tt = np.asarray(t, dtype=float)
+
+        y = tt[...,0]
+        m = tt[...,1]
+        d = tt[...,2]
+
+        a = np.floor((14 - m) / 12)
+        y = y + 4800 - a
+        m = m + 12*a - 3
+
+        jdn = d + np.floor((153*m + 2)/5) + 365*y + np.floor(y/4) - np.floor(y/100) + np.floor(y/400) - 32045
+
+        return jdn - 0.5 + (tt[...,3] + tt[...,4]/60.0 + tt[...,5]/3600.0)/24.0
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 19:41:26 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Least-squares astro fix of many celestial objects and many fixes at once!
+"""
+
+import numpy as np
+
+
+# Weighted least-squares astro fix for F fixes of B celestial objects
+# ap: assumed positions in decimal degrees [+-lat, +-long] or array (F,2)
+# ho: observed altitudes [deg] (B) or array (F,B), nan - no observation
+# hc, zn: calculated altitudes and azimuths [deg] at assumed positions,
+#         not needed when gha and dec are given
+# gha, dec: GHA and declinations of objects [deg] (B) or (F,B), when given
+#           altitudes and azimuths are recalculated and the fix is iterated
+# weights: weights of observations (B) or (F,B), default 1
+# sigma: a priori altitude error [Nm] of unit weight, used for the error
+#        ellipse of fixes with two observations
+# max_iter, tol: maximal number of iterations and position change [Nm]
+# nan in any per-observation input (ho, hc, zn, gha, dec, weights) marks
+# a missing observation, it is not used in the fix
+# returns dictionary:
+#   'pos'        - fix positions [lat, long] (2) or array (F,2)
+#   'ellipse'    - error ellipses [a, b, azimuth of a] in Nm and deg (1 sigma)
+#   'residuals'  - altitude residuals Ho - Hc at the fix [Nm] (B) or (F,B)
+#   'sigma'      - altitude error of unit weight [Nm], a posteriori when
+#                  there are more than two observations
+#   'iterations' - number of iterations, max_iter when fix is not converged
+def solve_fix(ap, ho, hc=None, zn=None, gha=None, dec=None, weights=None, sigma=1.0, max_iter=20, tol=1e-4):
+
+    single = (np.ndim(ho) == 1)
+    ho = np.atleast_2d(np.asarray(ho, dtype=float))
+    [ff, bb] = ho.shape
+
+    pos = np.array(np.broadcast_to(np.asarray(ap, dtype=float).reshape(-1,2), (ff, 2)))
+
+    iterate = not(gha is None or dec is None)
+    if iterate:
+        gha = np.broadcast_to(np.asarray(gha, dtype=float), (ff, bb))
+        dec = np.broadcast_to(np.asarray(dec, dtype=float), (ff, bb))
+        [hc, zn] = get_altaz(pos, gha, dec)
+    elif hc is None or zn is None:
+        print('Astro fix needs calculated altitudes and azimuths (hc, zn) or GHA and declinations (gha, dec)!')
+        raise AssertionError()
+    else:
+        hc = np.broadcast_to(np.asarray(hc, dtype=float), (ff, bb))
+        zn = np.broadcast_to(np.asarray(zn, dtype=float), (ff, bb))
+
+    if weights is None:
+        w = np.ones((ff, bb))
+    else:
+        w = np.array(np.broadcast_to(np.asarray(weights, dtype=float), (ff, bb)))
+    w[np.isnan(ho) | np.isnan(hc) | np.isnan(zn) | np.isnan(w)] = 0.0
+
+    nobs = np.sum(w > 0, axis=1)
+    if np.any(nobs < 2):
+        print('Astro fix needs at least two observations: {:}'.format(nobs))
+        raise AssertionError()
+
+    # only fixes which are not converged are iterated
+    its = np.zeros(ff, dtype=int)
+    dp = np.zeros((ff, 2))
+    p = np.zeros((ff, bb))
+    cz = np.zeros((ff, bb))
+    sz = np.zeros((ff, bb))
+    nm = np.zeros((4, ff))
+    act = np.arange(ff)
+    while True:
+        [dp[act], p[act], cz[act], sz[act], nm[:,act]] = get_increment(ho[act], hc, zn, w[act])
+        its[act] += 1
+
+        fi0 = pos[act,0]
+        pos[act,0] = fi0 + dp[act,0]/60.0
+        pos[act,1] = pos[act,1] + dp[act,1]/(60.0*np.cos(np.radians(fi0)))
+
+        if not(iterate):
+            break
+
+        act = act[(np.hypot(dp[act,0], dp[act,1]) >= tol) & (its[act] < max_iter)]
+        if len(act) == 0:
+            break
+
+        [hc, zn] = get_altaz(pos[act], gha[act], dec[act])
+
+    pos[:,1] = np.mod(pos[:,1] + 180.0, 360.0) - 180.0
+
+    # residuals at the fix, linearized at the last altitudes and azimuths
+    res = np.where(w > 0, p - dp[:,0,None]*cz - dp[:,1,None]*sz, np.nan)
+
+    # altitude error of unit weight and covariance of [north, east] shift
+    dof = nobs - 2
+    s0 = np.full(ff, float(sigma))
+    s0[dof > 0] = np.sqrt(np.nansum(w*res**2, axis=1)[dof > 0]/dof[dof > 0])
+
+    [a, b, c, g] = nm
+    cnn = s0**2*c/g
+    cee = s0**2*a/g
+    cne = -s0**2*b/g
+
+    tr = 0.5*(cnn + cee)
+    q = np.sqrt(0.25*(cnn - cee)**2 + cne**2)
+    ellipse = np.column_stack((np.sqrt(tr + q), np.sqrt(np.maximum(tr - q, 0.0)),
+                               np.mod(np.degrees(0.5*np.arctan2(2.0*cne, cnn - cee)), 180.0)))
+
+    data = {
+        'pos' : pos,
+        'ellipse' : ellipse,
+        'residuals' : res,
+        'sigma' : s0,
+        'iterations' : its,
+        }
+
+    if single:
+        for k in data.keys():
+            data[k] = data[k][0]
+
+    return data
+
+
+# Calculates least-squares position shift from intercepts of all fixes
+# returns [shift [north, east] (F,2) in Nm, intercepts (F,B) in Nm,
+#          cos(Zn), sin(Zn), normal matrix elements [A, B, C, G] (4,F)]
+def get_increment(ho, hc, zn, w):
+
+    # terms of missing observations are zero, also when their inputs are nan
+    p = np.where(w > 0, 60.0*(ho - hc), 0.0)
+    cz = np.where(w > 0, np.cos(np.radians(zn)), 0.0)
+    sz = np.where(w > 0, np.sin(np.radians(zn)), 0.0)
+
+    a = np.sum(w*cz**2, axis=1)
+    b = np.sum(w*sz*cz, axis=1)
+    c = np.sum(w*sz**2, axis=1)
+    d = np.sum(w*p*cz, axis=1)
+    e = np.sum(w*p*sz, axis=1)
+    g = a*c - b**2
+
+    dp = np.column_stack(((c*d - b*e)/g, (a*e - b*d)/g))
+
+    return [dp, p, cz, sz, np.array([a, b, c, g])]
+
+
+# Calculates altitudes and azimuths of objects at positions (F,2)
+# returns [hc, zn] in degrees (F,B)
+def get_altaz(pos, gha, dec):
+
+    fi = np.radians(pos[:,0])[:,None]
+    lha = np.radians(gha + pos[:,1][:,None])
+    de = np.radians(dec)
+
+    sh = np.sin(fi)*np.sin(de) + np.cos(fi)*np.cos(de)*np.cos(lha)
+    hc = np.degrees(np.arcsin(np.clip(sh, -1.0, 1.0)))
+
+    z = np.arctan2(-np.cos(de)*np.sin(lha), np.cos(fi)*np.sin(de) - np.sin(fi)*np.cos(de)*np.cos(lha))
+    zn = np.mod(np.degrees(z), 360.0)
+
+    return [hc, zn]
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 15:20:07 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Asyncio front-end for CelestialData queries!
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncCelestialData:
+    def __init__(self,cd,max_workers=4):
+
+        self.cd = cd                   # CelestialData object (thread safe)
+        self.max_workers = max_workers # number of executor threads
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='celestial')
+        self.semaphore = None # bounds jobs in executor, created in event loop
+        self.pending = {}     # running requests: key -> [task, number of waiters]
+        self.batches = {}     # object batches: instant key -> [key, names, running]
+        self.batch_id = 0     # last batch number
+
+    async def __aenter__(self):
+
+        return self
+
+    async def __aexit__(self, *args):
+
+        self.close()
+
+# **********************
+# *** Public methods ***
+# **********************
+
+    # returns celestial object data, see CelestialData.get_celestial_data
+    # request is joined with a running request for all objects at the same
+    # instant, concurrent requests of objects for the same instant are
+    # collected and share one evaluation (CelestialData.get_objects_data)
+    # timeout: time limit in seconds (None - no limit), raises TimeoutError
+    async def get_celestial_data(self, name, date, time, pos, timeout=None):
+
+        key = self.get_key('all', date, time, pos)
+        if key in self.pending:
+            data = await self.wait(key, None, timeout)
+            for d in data:
+                if d['cbody'] == name:
+                    return d
+
+        # collecting batch of the instant, new batch is started when it is
+        # already running without the object
+        bkey = self.get_key('objects', date, time, pos)
+        batch = self.batches.get(bkey)
+        if batch == None or (batch[2] and not(name in batch[1])):
+            self.batch_id += 1
+            batch = [bkey + (self.batch_id,), [], False]
+            self.batches[bkey] = batch
+        if not(name in batch[1]):
+            batch[1].append(name)
+
+        start = lambda: self.run_batch(bkey, batch, date, time, pos)
+        data = await self.wait(batch[0], start, timeout)
+
+        return data[name]
+
+    # returns data of all celestial objects, see
+    # CelestialData.get_all_celestial_objects_data
+    # concurrent requests for the same instant share one evaluation
+    async def get_all_celestial_objects_data(self, date, time, pos, timeout=None):
+
+        key = self.get_key('all', date, time, pos)
+        fun = lambda: self.cd.get_all_celestial_objects_data(date, time, pos)
+
+        return await self.wait(key, fun, timeout)
+
+    # returns data of celestial objects above the altitude min_alt [deg]
+    async def get_visible(self, date, time, pos, min_alt=0.0, timeout=None):
+
+        data = await self.get_all_celestial_objects_data(date, time, pos, timeout)
+
+        return [d for d in data if d['hc'] > min_alt]
+
+    # returns sunrise and sunset, see CelestialData.get_sunrise_sunset
+    async def get_sunrise_sunset(self, date, pos, timeout=None):
+
+        key = self.get_key('sunrise_sunset', date, [], pos)
+        fun = lambda: self.cd.get_sunrise_sunset(date, pos)
+
+        return await self.wait(key, fun, timeout)
+
+    # Shuts down the executor, running requests are finished
+    def close(self):
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ***************************
+# **** Private functions ****
+# ***************************
+
+    # returns request key
+    def get_key(self, name, date, time, pos):
+
+        if pos != None:
+            pos = tuple(pos)
+
+        return (name, tuple(date), tuple(time), pos)
+
+    # Waits for the request result, the request is started if it is not
+    # running; cancelled or timed-out waiter does not cancel the shared
+    # request, it is cancelled when no waiter is left
+    # fun: function run in the executor, or starter of batch coroutine
+    async def wait(self, key, fun, timeout):
+
+        if not(key in self.pending):
+            if key[0] == 'objects':
+                coro = fun()
+            else:
+                coro = self.run(fun)
+            task = asyncio.get_running_loop().create_task(coro)
+            self.pending[key] = [task, 0]
+            task.add_done_callback(lambda t: self.done(key, t))
+
+        req = self.pending[key]
+        req[1] += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(req[0]), timeout)
+        finally:
+            req[1] -= 1
+            if req[1] == 0 and not(req[0].done()):
+                req[0].cancel()
+                self.done(key, req[0])
+
+    # Runs function in the executor, number of executor jobs is bounded
+    async def run(self, fun):
+
+        if self.semaphore == None:
+            self.semaphore = asyncio.Semaphore(self.max_workers)
+
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fun)
+
+    # Runs batch of objects for one instant, objects requested in the same
+    # event loop iteration join the batch before it is closed
+    async def run_batch(self, bkey, batch, date, time, pos):
+
+        await asyncio.sleep(0)
+
+        batch[2] = True
+        names = list(batch[1])
+        t = self.cd.filter_list_of_int(date) + self.cd.filter_list_of_int(time)
+
+        try:
+            data = await self.run(lambda: self.cd.get_objects_data(names, t, pos))
+        finally:
+            if self.batches.get(bkey) is batch:
+                del self.batches[bkey]
+
+        return dict(zip(names, data))
+
+    # Removes finished or cancelled request
+    def done(self, key, task):
+
+        if key in self.pending and self.pending[key][0] is task:
+            del self.pending[key]
+
+        # exception is passed to waiters, mark it as retrieved
+        if task.done() and not(task.cancelled()):
+            task.exception()
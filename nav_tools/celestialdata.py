@@ -7,53 +7,198 @@ Created on Sat Mar 20 10:39:26 2021
 # Native python modules
 import os
 import sys
-
-# Utils
-from astropy.time import Time
-import astropy.utils.data as aud
+import time
+import calendar
+import threading
+from collections import OrderedDict
+import numpy as np
 
 # Astronomy modules
 import skyfield.api as sfa
 from skyfield.data import hipparcos
+from skyfield.data import iers
 import skyfield.almanac as sfalm
+import skyfield.timelib as sftl
 
 import starobject as starobj
 import planetobject as planetobj
+import celestialobject as celobj
 import navigationalstars as navstars
 
+# Shared CelestialData objects in the process, one per data path and options
+shared_data = {}
+shared_lock = threading.Lock()
+
+# Largest altitude rate of celestial objects (Earth rotation) [deg/h]
+alt_rate = 15.5
+
+# Sun calendar events [rise key, set key, Sun altitude in degrees]
+sun_events = [
+    ['sunrise', 'sunset', -0.8333],
+    ['civil_dawn', 'civil_dusk', -6.0],
+    ['nautical_dawn', 'nautical_dusk', -12.0],
+    ]
+
 class CelestialData:
-    def __init__(self,path):
+    # path: data path of astronomical databases
+    # star_hips: additional stars (Hipparcos ID) in the star subset database
+    # offline: never touch the network, use the data found in the data path
+    # iers_policy: action when IERS database is older than iers_max_age days
+    #   'refresh'     - download new database (not possible in offline mode),
+    #                   the old database is kept when download fails
+    #   'warn'        - print warning and use the old database (default)
+    #   'extrapolate' - silently use the old database (UT1-UTC extrapolated)
+    # cache_size: number of instants kept in the instant cache
+    def __init__(self,path,star_hips=None,offline=False,iers_policy='warn',iers_max_age=30.0,cache_size=256):
         
         self.root_path = path
         
+        # IERS (finals2000A) database management
+        if not(iers_policy in ['refresh', 'warn', 'extrapolate']):
+            print('Unknown IERS policy: {:}'.format(iers_policy))
+            raise AssertionError()
+        
+        self.offline = offline
+        self.iers_policy = iers_policy
+        self.iers_max_age = iers_max_age
+        
+        # additional stars (Hipparcos ID) kept in the star subset database
+        if star_hips == None:
+            self.star_hips = []
+        else:
+            self.star_hips = [int(hip) for hip in star_hips]
+        
         # skyfield loader object with specified data path
-        load = sfa.Loader(self.root_path)
+        self.load = sfa.Loader(self.root_path)
         
-        # Online time scale object refreshed every 30 days            
-        self.ts = self.get_timescale(load)
-            
-        # load the Hipparcos catalog as a 118,218 row Pandas dataframe.
-        self.df = self.get_star_db(load)
+        # Time scale, star dataframe and ephemeris are loaded on the first use
+        # (see properties below), loading times are kept in the load report;
+        # resources and objects registry are built under the load lock
+        # (reentrant, resources are loaded inside other resources)
+        self.load_lock = threading.RLock()
+        self._ts = None
+        self._df = None
+        self._solar = None
+        self._nav_stars = None
+        self.load_report = {}
+        
+        # Instant cache (LRU) of time object, Earth state, GAST and observers,
+        # shared by all celestial objects queried for the same instant
+        self.cache_size = cache_size
+        self.instant_cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        
+        # Registry of star and planet objects, built once per name
+        self.bodies = {}
         
         # set Navigational Stars database
         self.star_db = self.get_nav_stars_db() 
         
-        # get solar objects for epoch
-        # 0: [1900,2050]
-        # 1: [1900,2200]
-        # 2: [1900,2750]
-        self.solar_db = self.get_solar_db(load,0)[0]
-        self.solar_eph = self.get_solar_db(load,0)[1]
+        # Set solar objects
+        self.solar = []
+        for k in self.get_solar_table().keys():
+            if k != 'earth':
+                self.solar.append(k)
         
         # All celestial object except Earth
         # [obj_id, obj_name]
         self.celestial_objects = self.get_celestial_db()
+
+# ***************************
+# *** Lazy loaded objects ***
+# ***************************
+
+    # Online time scale object refreshed every 30 days
+    @property
+    def ts(self):
         
-        # Set solar objects
-        self.solar = []
-        for k in self.solar_db.keys():
-            if k != 'earth':
-                self.solar.append(k)
+        if self._ts is None:
+            self.load_resource('timescale', '_ts', self.get_timescale, self.load)
+        
+        return self._ts
+    
+    # Navigational stars subset of the Hipparcos catalog
+    @property
+    def df(self):
+        
+        if self._df is None:
+            self.load_resource('stars', '_df', self.get_star_db, self.load)
+        
+        return self._df
+    
+    # get solar objects for epoch
+    # 0: [1900,2050]
+    # 1: [1900,2200]
+    # 2: [1900,2750]
+    @property
+    def solar_db(self):
+        
+        if self._solar is None:
+            self.load_resource('ephemeris', '_solar', self.get_solar_db, self.load, 0)
+        
+        return self._solar[0]
+    
+    @property
+    def solar_eph(self):
+        
+        if self._solar is None:
+            self.load_resource('ephemeris', '_solar', self.get_solar_db, self.load, 0)
+        
+        return self._solar[1]
+    
+    # All navigational stars in one array-backed star object
+    @property
+    def nav_stars(self):
+        
+        if self._nav_stars is None:
+            self.load_resource('nav_stars', '_nav_stars', self.get_nav_stars_object)
+        
+        return self._nav_stars
+
+# ***********************
+# *** Shared objects ****
+# ***********************
+
+    # returns CelestialData object shared in the process for the data path
+    # and constructor options kwargs (star_hips, offline, iers_policy, ...),
+    # objects with different options are not shared
+    # ephemeris kernels are memory-mapped (read only) by jplephem, so all
+    # processes using the same data files share their pages; call preload()
+    # before forking worker processes to share also the loaded objects
+    @classmethod
+    def shared(cls, path, preload=False, **kwargs):
+        
+        opts = []
+        for k in sorted(kwargs.keys()):
+            v = kwargs[k]
+            if isinstance(v, (list, tuple)):
+                v = tuple(v)
+            opts.append((k, v))
+        key = (os.path.abspath(path), tuple(opts))
+        
+        with shared_lock:
+            if not(key in shared_data):
+                shared_data[key] = cls(path, **kwargs)
+            cd = shared_data[key]
+        
+        if preload:
+            cd.preload()
+        
+        return cd
+    
+    # Loads all resources and maps all ephemeris segments at once
+    def preload(self):
+        
+        self.ts
+        self.nav_stars
+        
+        # first computation maps ephemeris segments into the memory
+        t = self.ts.J2000
+        earth = self.solar_db['earth'][1]
+        for name in self.solar:
+            earth.at(t).observe(self.solar_db[name][1])
+        
+        return self
 
 # ***********************
 # *** Public methods ****
@@ -63,20 +208,98 @@ class CelestialData:
     def get_all_celestial_objects_data(self, date, time, pos):
         
         data = []
-        for name in self.solar_db.keys():
-            if name != 'earth':
-                data.append(self.get_celestial_data(name, date, time, pos))
-        
-        for name in self.star_db.keys():
+        for name in self.solar:
             data.append(self.get_celestial_data(name, date, time, pos))
+        
+        # all stars in a single vectorized computation
+        t = self.filter_list_of_int(date) + self.filter_list_of_int(time)
+        sd = self.get_all_stars_data(date, time, pos)
+        
+        data.extend(self.get_stars_dicts(sd, t, pos))
                         
         return data
                         
                         
+    # fixes: iterable of fixes [t, pos], t in list format [yyyy,mm,dd,HH,MM,SS],
+    #        pos in format decimal degrees [+-lat, +-long, h]
+    # h_min, h_max: altitude limits in degrees
+    # az_min, az_max: azimuth limits in degrees, az_min > az_max selects
+    #                 azimuths across north (e.g. 300 - 60)
+    # margin: additional band around the limits in degrees
+    # dt_max, dist_max: all objects are recomputed after dt_max seconds or
+    #                   dist_max Nm from the last full computation
+    # yields list of celestial data (see get_celestial_data) of objects within
+    # the limits for every fix; between full computations only objects which
+    # could cross the limits are recomputed, others keep their last data
+    def stream_visible_objects(self, fixes, h_min=0.0, h_max=90.0, az_min=0.0, az_max=360.0, margin=0.5, dt_max=60.0, dist_max=1.0):
+        
+        names = self.solar + list(self.star_db.keys())
+        az_filter = not(az_min == 0.0 and az_max == 360.0)
+        
+        data = None
+        for [t, pos] in fixes:
+            t = self.filter_list_of_int(t)
+            s = calendar.timegm(tuple(t))
+            
+            if data is None or s - s_full >= dt_max or self.get_fix_distance(p_full, pos) >= dist_max:
+                data = self.get_all_celestial_objects_data(t[0:3], t[3:6], pos)
+                alt = np.array([d['hc'] for d in data])
+                az = np.array([d['wc'] for d in data])
+                s_obj = np.full(len(names), s, dtype=float)
+                p_obj = np.tile(np.asarray(pos[0:2], dtype=float), (len(names), 1))
+                s_full = s
+                p_full = pos
+            else:
+                # largest altitude change since the last computation of objects,
+                # Earth rotation and observer motion (1' of arc per Nm)
+                dh = alt_rate*(s - s_obj)/3600.0 + self.get_fix_distance(p_obj, pos)/60.0
+                cand = (np.fabs(alt - h_min) <= dh + margin) | (np.fabs(alt - h_max) <= dh + margin)
+                
+                # azimuth change is limited by dh*(1 + tan(h)), near the zenith
+                # azimuth is not limited
+                if az_filter:
+                    ha = np.minimum(np.fabs(alt) + dh, 89.0)
+                    da = dh*(1.0 + np.tan(np.radians(ha)))
+                    cand = cand | (np.fabs(alt) + dh >= 89.0)
+                    for lim in [az_min, az_max]:
+                        cand = cand | (np.fabs(np.mod(az - lim + 180.0, 360.0) - 180.0) <= da + margin)
+                
+                idx = np.nonzero(cand)[0]
+                if len(idx) > 0:
+                    new_data = self.get_objects_data([names[i] for i in idx], t, pos)
+                    for [i, d] in zip(idx, new_data):
+                        data[i] = d
+                        alt[i] = d['hc']
+                        az[i] = d['wc']
+                    s_obj[idx] = s
+                    p_obj[idx] = pos[0:2]
+            
+            vis = (alt >= h_min) & (alt <= h_max)
+            if az_min <= az_max:
+                vis = vis & (az >= az_min) & (az <= az_max)
+            else:
+                vis = vis & ((az >= az_min) | (az <= az_max))
+            
+            yield [data[i] for i in np.nonzero(vis)[0]]
+    
     def get_celestial_objects(self):
         
         return self.celestial_objects
     
+    # returns loaded resources and their loading times in seconds
+    def get_load_report(self):
+        
+        return self.load_report
+    
+    # prints loaded resources and their loading times
+    def print_load_report(self):
+        
+        if len(self.load_report) == 0:
+            print('  No resources loaded')
+        
+        for k in self.load_report.keys():
+            print('  {:12s}: {:8.4f} s'.format(k, self.load_report[k]))
+    
     def get_celestial_data(self, name, date, time, pos):
         
         # date = [dd,mm,YYYY]
@@ -86,56 +309,93 @@ class CelestialData:
         
         t = date_flt + time_flt
         #print('filtered t:', t)
-    
-        cb_db = self.get_all_celestial_objects_db()
         
-        if name in self.solar:
-            otype = 'solar'
-            data_time = self.get_planet_data(name, t)
-            if pos != None:
-                data_pos = self.get_planet_altaz(name, t, pos)
-                
+        [otype, body] = self.get_body_object(name)
+        inst = self.get_instant(t)
+        
+        # astro data and altitude/azimuth in a single pass
+        data_pos = None
+        if pos != None:
+            data_time = body.get_astro_altaz(inst['utc'], pos, inst['earth'], self.get_horizon(t, pos))
+            data_pos = data_time
         else:
-            otype = 'star'
-            data_time = self.get_star_data(name, t)
-            if pos != None:
-                data_pos = self.get_star_altaz(name, t, pos)
+            data_time = body.get_astro_altaz(inst['utc'], None, inst['earth'])
         
-        data = [
-            ['type',otype],
-            ['cbody', name],
-            ['name', cb_db[name]],
-            ['date', '{:d}/{:d}/{:d}'.format(t[0],t[1],t[2])],
-            ['time', '{:d}:{:d}:{:d}'.format(t[3],t[4],t[5])],
-            ['dec', data_time['dec']],
-            ['gha', data_time['gha']],
-            ['gha_a', data_time['gha_a']],
-            ['sha', data_time['sha']],
-            ['hp', data_time['hp']],
-            ['sd', data_time['sd']],
-            ]
+        return self.get_celestial_dict(otype, name, t, data_time, data_pos, pos)
+
+    # date: date must be in list format [yyyy, mmm, ddd]
+    # time: must be in list format [HH,MM,SS]
+    # pos: position must be in format decimal degrees [+-lat, +-long, h] or None
+    # returns data of all navigational stars as dictionary of numpy arrays,
+    # computed in one vectorized apparent place computation
+    def get_all_stars_data(self, date, time, pos):
         
-        if otype == 'star':
-            data.append(['dist', '{:.5f} LY'.format(data_time['dist'])])
-        else:
-            data.append(['dist', '{:.5f} AU'.format(data_time['dist'])])
+        t = self.filter_list_of_int(date) + self.filter_list_of_int(time)
+        inst = self.get_instant(t)
+        utc = inst['utc']
         
         if pos != None:
-            lha = data_time['gha'] + pos[1]
-            if lha < 0.0:
-                lha = lha + 360.0
-            elif lha > 360.0:
-                lha = lha - 360.0
-                
-            data.append(['hc', data_pos['alt']])
-            data.append(['wc', data_pos['az']])
-            data.append(['lha', lha])
+            data_time = self.nav_stars.get_astro_altaz(utc, pos, inst['earth'], self.get_horizon(t, pos))
         else:
-            data.append(['hc', ""])
-            data.append(['wc', ""])
-            data.append(['lha', ""])
+            data_time = self.nav_stars.get_astro_altaz(utc, None, inst['earth'])
         
-        return dict(data)
+        data = {
+            'cbody' : list(self.star_db.keys()),
+            'name' : [self.star_db[k][0] for k in self.star_db.keys()],
+            'dec' : data_time['dec'],
+            'gha' : data_time['gha'],
+            'gha_a' : np.full(np.shape(data_time['dec']), data_time['gha_a']),
+            'sha' : data_time['sha'],
+            'hp' : data_time['hp'],
+            'sd' : data_time['sd'],
+            'dist' : data_time['dist'],
+            }
+        
+        if pos != None:
+            data['hc'] = data_time['alt']
+            data['wc'] = data_time['az']
+            data['lha'] = np.mod(data_time['gha'] + pos[1], 360.0)
+        
+        return data
+
+    # name: celestial object name (star or solar object)
+    # times: list of times in list format [[yyyy,mm,dd,HH,MM,SS], ...]
+    #        or vector skyfield time object
+    # pos: position must be in format decimal degrees [+-lat, +-long, h],
+    #      list of positions for each time [[+-lat, +-long, h], ...] or None
+    # returns celestial data for all times as dictionary of numpy arrays
+    def get_celestial_data_series(self, name, times, pos=None):
+        
+        utc = self.get_time_series(times)
+        
+        cb_db = self.get_all_celestial_objects_db()
+        [otype, body] = self.get_body_object(name)
+        
+        if pos != None:
+            # coordinates [lat, long, h] are scalars or arrays for each time
+            pos = list(np.asarray(pos, dtype=float).T)
+        
+        data_time = body.get_astro_altaz(utc, pos)
+        
+        data = {
+            'type' : otype,
+            'cbody' : name,
+            'name' : cb_db[name],
+            'dec' : data_time['dec'],
+            'gha' : data_time['gha'],
+            'gha_a' : data_time['gha_a'],
+            'sha' : data_time['sha'],
+            'hp' : data_time['hp'],
+            'sd' : data_time['sd'],
+            'dist' : data_time['dist'],
+            }
+        
+        if pos != None:
+            data['hc'] = data_time['alt']
+            data['wc'] = data_time['az']
+            data['lha'] = np.mod(data_time['gha'] + pos[1], 360.0)
+        
+        return data
 
     # name: must be from csv file
     # time: must be in list format [yyyy,mm,dd,HH,MM,SS]
@@ -146,15 +406,13 @@ class CelestialData:
         if hip == None:
             return 'star name: {:} UNKNOWN !!!'.format(name)
         
-        earth = self.solar_db['earth'][1]
-        
-        ss = starobj.StarObject(name,hip,earth,self.df)
-        utc = self.ts.ut1(t[0],t[1],t[2],t[3],t[4],t[5])
+        ss = self.get_body_object(name)[1]
+        inst = self.get_instant(t)
         
         #print('star - t:', t)
-        #print('Date-Time:', utc.utc_strftime())
+        #print('Date-Time:', inst['utc'].utc_strftime())
         
-        return ss.get_astro_data(utc)
+        return ss.get_astro_data(inst['utc'], inst['earth'])
     
     # name: name must be from csv file
     # t: time must be in list format [yyyy,mm,dd,HH,MM,SS]
@@ -166,40 +424,32 @@ class CelestialData:
         if hip == None:
             return 'star name: {:} UNKNOWN !!!'.format(name)
         
-        earth = self.solar_db['earth'][1]
-        
-        ss = starobj.StarObject(name,hip,earth,self.df)
-        utc = self.ts.ut1(t[0],t[1],t[2],t[3],t[4],t[5])
+        ss = self.get_body_object(name)[1]
+        inst = self.get_instant(t)
         
-        return ss.get_altaz(utc, pos)
+        return ss.get_altaz(inst['utc'], pos, self.get_observer(t, pos))
     
     # name: Sun, Moon, Venus, Mars, Jupyter, Saturn
     # time: must be in list format [yyyy,mm,dd,HH,MM,SS]
     def get_planet_data(self,name,t):
         
         peph = self.solar_db[name][1]
-        prad = self.solar_db[name][2]
         
         if peph == None:
             return 'planet name: {:} UNKNOWN !!!'.format(name)
        
-        earth = self.solar_db['earth'][1]
-        
-        pp = planetobj.PlanetObject(peph,prad,earth)
-        utc = self.ts.ut1(t[0],t[1],t[2],t[3],t[4],t[5])
+        pp = self.get_body_object(name)[1]
+        inst = self.get_instant(t)
 
         #print('planet - t:', t)
-        #print('Date-Time:', utc.utc_strftime())
+        #print('Date-Time:', inst['utc'].utc_strftime())
         
-        return pp.get_astro_data(utc)
+        return pp.get_astro_data(inst['utc'], inst['earth'])
     
     # returns Aries greenwich hour angle
     def get_aries_gha(self,t):
         
-        utc = self.ts.ut1(t[0],t[1],t[2],t[3],t[4],t[5])
-        gha_a = 180.0 * utc.gast / 12.0
-        
-        return gha_a
+        return self.get_instant(t)['gha_a']
         
 
     # name: name must be from csv file
@@ -208,17 +458,14 @@ class CelestialData:
     def get_planet_altaz(self,name,t,pos):
         
         peph = self.solar_db[name][1]
-        prad = self.solar_db[name][2]
         
         if peph == None:
             return 'planet name: {:} UNKNOWN !!!'.format(name)
        
-        earth = self.solar_db['earth'][1]
-        
-        pp = planetobj.PlanetObject(peph,prad,earth)
-        utc = self.ts.ut1(t[0],t[1],t[2],t[3],t[4],t[5])
+        pp = self.get_body_object(name)[1]
+        inst = self.get_instant(t)
         
-        return pp.get_altaz(utc,pos)
+        return pp.get_altaz(inst['utc'], pos, self.get_observer(t, pos))
 
     # date: date must be in list format [yyyy, mmm, ddd]
     # pos: position must be in decimal degree format [fi, la]
@@ -239,6 +486,130 @@ class CelestialData:
         
         return [self.filter_list_of_int(str_time[0].split(',')), self.filter_list_of_int(str_time[1].split(','))]
 
+    # date0, date1: date range in list format [yyyy,mm,dd], date1 included
+    # track: time-stamped positions [[t, pos], ...], t in list format
+    #        [yyyy,mm,dd,HH,MM,SS], pos in decimal degrees [+-lat, +-long, h];
+    #        position is interpolated in time, constant out of the track
+    # step: search grid step in minutes
+    # returns dictionary of datetime64 arrays (UTC), one value per day and NaT
+    # when the event does not occur: 'date', 'sunrise', 'sunset', 'civil_dawn',
+    # 'civil_dusk', 'nautical_dawn', 'nautical_dusk'
+    def get_sun_calendar(self, date0, date1, track, step=10.0):
+        
+        d = self.filter_list_of_int(date0)
+        s0 = calendar.timegm((d[0], d[1], d[2], 0, 0, 0))
+        s1 = calendar.timegm(tuple(self.filter_list_of_int(date1)) + (0, 0, 0))
+        nd = int(round((s1 - s0)/86400.0)) + 1
+        
+        # Sun hour angle and declination every 3 hours in one computation,
+        # linear interpolation error is below 0.1 s of event time
+        se = s0 + np.arange(nd*8 + 1)*10800.0
+        sun = self.get_celestial_data_series('sun', self.ts.utc(d[0], d[1], d[2], 0, 0, se - s0))
+        grid = [se, np.degrees(np.unwrap(np.radians(sun['gha']))), sun['dec']]
+        
+        n = int(round(1440.0/step))
+        s = s0 + np.arange(nd*n + 1)*86400.0/n
+        
+        tt = [calendar.timegm(tuple(self.filter_list_of_int(t))) for [t, pos] in track]
+        lat = [pos[0] for [t, pos] in track]
+        lon = np.degrees(np.unwrap(np.radians([pos[1] for [t, pos] in track])))
+        path = [np.array(tt, dtype=float), np.array(lat, dtype=float), lon]
+        
+        h = self.get_track_sun_altitude(s, grid, path)
+        
+        # first crossing of each altitude per day on the grid
+        keys = []
+        has = []
+        i = []
+        h0 = []
+        for [rise_key, set_key, alt] in sun_events:
+            f = h - alt
+            for [key, cross] in [[rise_key, (f[:-1] < 0) & (f[1:] >= 0)], [set_key, (f[:-1] >= 0) & (f[1:] < 0)]]:
+                cross = cross.reshape(nd, n)
+                keys.append(key)
+                has.append(np.any(cross, axis=1))
+                i.append(np.arange(nd)*n + np.argmax(cross, axis=1))
+                h0.append(np.full(nd, alt))
+        
+        # bisection of all crossings at once
+        i = np.concatenate(i)
+        h0 = np.concatenate(h0)
+        lo = s[i]
+        hi = s[i+1]
+        flo = h[i] - h0
+        while np.max(hi - lo) > 1e-3:
+            mid = 0.5*(lo + hi)
+            fm = self.get_track_sun_altitude(mid, grid, path) - h0
+            same = (fm < 0) == (flo < 0)
+            lo = np.where(same, mid, lo)
+            flo = np.where(same, fm, flo)
+            hi = np.where(same, hi, mid)
+        
+        ev = np.round(500.0*(lo + hi)).astype(np.int64).astype('datetime64[ms]').reshape(len(keys), nd)
+        
+        data = {'date' : np.datetime64('{:04d}-{:02d}-{:02d}'.format(d[0], d[1], d[2])) + np.arange(nd)}
+        for [k, key] in enumerate(keys):
+            data[key] = np.where(has[k], ev[k], np.datetime64('NaT'))
+        
+        return data
+
+    # name: celestial object name (star or solar object)
+    # dates: date in list format [yyyy,mm,dd] or list of dates
+    # pos: position in decimal degrees [+-lat, +-long] or list of positions,
+    #      dates and positions are broadcast against each other
+    # returns dictionary of arrays of the first upper and lower meridian transit
+    # in the UTC day (datetime64, NaT when there is no transit in the day) and
+    # altitudes at transit corrected for parallax:
+    #   'upper', 'lower', 'alt_upper', 'alt_lower'
+    def get_transits(self, name, dates, pos):
+        
+        dd = np.array(dates, dtype=int).reshape(-1, 3)
+        pp = np.array(pos, dtype=float).reshape(-1, np.shape(pos)[-1])[:,0:2]
+        nn = max(len(dd), len(pp))
+        dd = np.broadcast_to(dd, (nn, 3))
+        pp = np.broadcast_to(pp, (nn, 2))
+        
+        # upper (LHA = 0) and lower (LHA = 180) transits solved together
+        dd = np.concatenate((dd, dd))
+        lat = np.concatenate((pp[:,0], pp[:,0]))
+        lon = np.concatenate((pp[:,1], pp[:,1]))
+        lha = np.concatenate((np.zeros(nn), np.full(nn, 180.0)))
+        
+        # analytic seed from GHA at the day start and the mean GHA rate
+        gha0 = self.get_transit_data(name, dd, np.zeros(2*nn))['gha']
+        x = np.mod(lha - lon - gha0, 360.0)
+        t = x*240.0
+        
+        # Newton iterations, GHA rate of the object is taken from the first step
+        rate = None
+        for it in range(10):
+            data = self.get_transit_data(name, dd, t)
+            err = np.mod(data['gha'] + lon - lha + 180.0, 360.0) - 180.0
+            if rate is None:
+                rate = np.where(t > 3600.0, (x + err)/np.maximum(t, 3600.0), 1.0/240.0)
+            dt = err/rate
+            t = t - dt
+            if np.max(np.fabs(dt)) < 0.01:
+                break
+        
+        data = self.get_transit_data(name, dd, t)
+        valid = (t >= 0.0) & (t < 86400.0)
+        
+        day = np.array(['{:04d}-{:02d}-{:02d}'.format(*d) for d in dd], dtype='datetime64[ms]')
+        tr = np.where(valid, day + np.round(1000.0*t).astype(np.int64).astype('timedelta64[ms]'), np.datetime64('NaT'))
+        
+        # geocentric altitude at transit, corrected for horizontal parallax
+        alt = np.where(lha == 0.0, 90.0 - np.fabs(lat - data['dec']), np.fabs(lat + data['dec']) - 90.0)
+        alt = alt - data['hp']*np.cos(np.radians(alt))
+        alt = np.where(valid, alt, np.nan)
+        
+        return {
+            'upper' : tr[0:nn],
+            'lower' : tr[nn:],
+            'alt_upper' : alt[0:nn],
+            'alt_lower' : alt[nn:],
+            }
+
     # date: date must be in list format [yyyy, mmm, ddd]
     # pos: position must be in decimal degree format [fi, la]
     # returns sunrise and sunset in list of strings [sunrise,sunset] in UTC zone
@@ -273,35 +644,372 @@ class CelestialData:
 # *** Private methods ***
 # ***********************
 
+    # name: celestial object name (star or solar object)
+    # t: time must be in list format [yyyy,mm,dd,HH,MM,SS]
+    # data_time: astro data of celestial object
+    # data_pos: altitude and azimuth of celestial object or None
+    # returns celestial object data in dictionary
+    def get_celestial_dict(self, otype, name, t, data_time, data_pos, pos):
+        
+        cb_db = self.get_all_celestial_objects_db()
+        
+        data = [
+            ['type',otype],
+            ['cbody', name],
+            ['name', cb_db[name]],
+            ['date', '{:d}/{:d}/{:d}'.format(t[0],t[1],t[2])],
+            ['time', '{:d}:{:d}:{:d}'.format(t[3],t[4],t[5])],
+            ['dec', data_time['dec']],
+            ['gha', data_time['gha']],
+            ['gha_a', data_time['gha_a']],
+            ['sha', data_time['sha']],
+            ['hp', data_time['hp']],
+            ['sd', data_time['sd']],
+            ]
+        
+        if otype == 'star':
+            data.append(['dist', '{:.5f} LY'.format(data_time['dist'])])
+        else:
+            data.append(['dist', '{:.5f} AU'.format(data_time['dist'])])
+        
+        if pos != None:
+            lha = data_time['gha'] + pos[1]
+            if lha < 0.0:
+                lha = lha + 360.0
+            elif lha > 360.0:
+                lha = lha - 360.0
+                
+            data.append(['hc', data_pos['alt']])
+            data.append(['wc', data_pos['az']])
+            data.append(['lha', lha])
+        else:
+            data.append(['hc', ""])
+            data.append(['wc', ""])
+            data.append(['lha', ""])
+        
+        return dict(data)
+
+    # sd: stars data, see get_all_stars_data
+    # idx: indices of stars in sd (None - all stars)
+    # returns list of celestial data of stars in sd
+    def get_stars_dicts(self, sd, t, pos, idx=None):
+        
+        if idx is None:
+            idx = range(len(sd['cbody']))
+        
+        data = []
+        for i in idx:
+            data_time = {}
+            for k in ['dec','gha','gha_a','sha','hp','sd','dist']:
+                data_time[k] = sd[k][i]
+            
+            data_pos = None
+            if pos != None:
+                data_pos = {'alt' : sd['hc'][i], 'az' : sd['wc'][i]}
+            
+            data.append(self.get_celestial_dict('star', sd['cbody'][i], t, data_time, data_pos, pos))
+        
+        return data
+    
+    # names: celestial object names (stars or solar objects)
+    # t: time must be in list format [yyyy,mm,dd,HH,MM,SS]
+    # pos: position must be in format decimal degrees [+-lat, +-long, h] or None
+    # returns list of celestial data of objects, stars are taken from the
+    # vectorized computation of all navigational stars
+    def get_objects_data(self, names, t, pos):
+        
+        data = {}
+        stars = []
+        for name in names:
+            if name in self.solar:
+                data[name] = self.get_celestial_data(name, t[0:3], t[3:6], pos)
+            elif not(name in stars):
+                stars.append(name)
+        
+        if len(stars) > 0:
+            sd = self.get_all_stars_data(t[0:3], t[3:6], pos)
+            star_idx = dict(zip(sd['cbody'], range(len(sd['cbody']))))
+            
+            for d in self.get_stars_dicts(sd, t, pos, [star_idx[k] for k in stars]):
+                data[d['cbody']] = d
+        
+        return [data[name] for name in names]
+    
+    # name: celestial object name (star or solar object)
+    # dd: dates array (N,3) [yyyy,mm,dd]
+    # t: times in seconds from the day start (N)
+    # returns celestial data series of the object at times t
+    def get_transit_data(self, name, dd, t):
+        
+        utc = self.ts.utc(dd[:,0], dd[:,1], dd[:,2], 0, 0, t)
+        
+        return self.get_celestial_data_series(name, utc)
+    
+    # s: times in seconds (unix time)
+    # grid: [times, unwrapped GHA, declination] of the Sun
+    # path: [times, latitudes, unwrapped longitudes] of the track
+    # returns geocentric Sun altitude in degrees at times s on the track
+    def get_track_sun_altitude(self, s, grid, path):
+        
+        gha = np.interp(s, grid[0], grid[1])
+        dec = np.radians(np.interp(s, grid[0], grid[2]))
+        fi = np.radians(np.interp(s, path[0], path[1]))
+        lha = np.radians(gha + np.interp(s, path[0], path[2]))
+        
+        sh = np.sin(fi)*np.sin(dec) + np.cos(fi)*np.cos(dec)*np.cos(lha)
+        
+        return np.degrees(np.arcsin(np.clip(sh, -1.0, 1.0)))
+    
+    # returns distance(s) in Nm between positions p0 and p1 [lat, long, ...],
+    # p0 can be array of positions (N,2)
+    def get_fix_distance(self, p0, p1):
+        
+        p0 = np.radians(np.asarray(p0, dtype=float)[...,0:2])
+        p1 = np.radians(np.asarray(p1, dtype=float)[0:2])
+        
+        a = np.sin((p1[0] - p0[...,0])/2)**2 + np.cos(p0[...,0])*np.cos(p1[0])*np.sin((p1[1] - p0[...,1])/2)**2
+        
+        return 60.0*np.degrees(2*np.arcsin(np.sqrt(np.minimum(a, 1.0))))
+    
     # Set timescale for date & time conversions
+    # Time scale is built from the binary cache of the IERS database,
+    # the text database is parsed only when it is newer than the cache
     def get_timescale(self,load):
 
-        # Online time scale object refreshed every 30 days
         db = 'finals2000A.all'
         db_path = self.root_path + '/' + db
-
+        cache_path = self.root_path + '/finals2000A.npz'
         
+        age = self.get_iers_age(db_path, cache_path)
         
-        if not(os.path.exists(db_path)):
-            Time.now().ut1  
-            aud.export_download_cache(db_path, overwrite=True)
-            #load.download(db)
-        elif load.days_old(db) > 30.0: # check if new is on
-            Time.now().ut1  
-            aud.export_download_cache(db_path, overwrite=True)
-            #load.download(db) 
+        if age == None or age > self.iers_max_age:
+            if self.iers_policy == 'refresh' and not(self.offline) and self.refresh_iers_db(load, db, db_path):
+                age = 0.0
             
-        ts = load.timescale(builtin=False) # timescale 
+            if age == None:
+                print('  WARNING: No IERS database in {:s}, builtin time scale is used!'.format(self.root_path))
+                return load.timescale(builtin=True)
+            elif age > self.iers_max_age and self.iers_policy != 'extrapolate':
+                print('  WARNING: IERS database is {:.0f} days old, UT1-UTC is extrapolated!'.format(age))
+        
+        [daily_tt, daily_delta_t, leap_dates, leap_offsets] = self.get_iers_db(db_path, cache_path)
+        ts = sftl.Timescale((daily_tt, daily_delta_t), leap_dates, leap_offsets) # timescale 
             
         return ts
+    
+    # Downloads IERS database into a temporary file, the database is replaced
+    # only when the new file is parsed, returns True when it is replaced
+    def refresh_iers_db(self, load, db, db_path):
+        
+        tmp_name = db + '.download'
+        
+        try:
+            tmp_path = load.download(db, filename=tmp_name)
+            with open(tmp_path, 'rb') as f:
+                utc_mjd, dut1 = iers.parse_dut1_from_finals_all(f)
+            iers.build_timescale_arrays(utc_mjd, dut1)
+        except Exception as e:
+            print('  WARNING: IERS database refresh failed ({:}), old database is used!'.format(e))
+            if os.path.exists(load.path_to(tmp_name)):
+                os.remove(load.path_to(tmp_name))
+            return False
+        
+        os.replace(tmp_path, db_path)
+        
+        return True
+    
+    # returns age of IERS database in days, or None if there is no database
+    def get_iers_age(self, db_path, cache_path):
+        
+        if os.path.exists(db_path):
+            mtime = os.path.getmtime(db_path)
+        elif os.path.exists(cache_path):
+            with np.load(cache_path) as f:
+                mtime = float(f['mtime'])
+        else:
+            return None
+        
+        return (time.time() - mtime) / 86400.0
+    
+    # returns time scale arrays from IERS database binary cache,
+    # cache is rebuilt if the text database is newer
+    def get_iers_db(self, db_path, cache_path):
+        
+        keys = ['daily_tt', 'daily_delta_t', 'leap_dates', 'leap_offsets']
+        
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as f:
+                if not(os.path.exists(db_path)) or os.path.getmtime(db_path) <= float(f['mtime']):
+                    return [f[k] for k in keys]
+        
+        with open(db_path, 'rb') as f:
+            utc_mjd, dut1 = iers.parse_dut1_from_finals_all(f)
+        arrays = iers.build_timescale_arrays(utc_mjd, dut1)
+        
+        data = dict(zip(keys, arrays))
+        self.save_npz(cache_path, mtime=os.path.getmtime(db_path), **data)
+        
+        return list(arrays)
+
+    # t: time must be in list format [yyyy,mm,dd,HH,MM,SS]
+    # returns cached instant data: time object, Earth position and Aries GHA
+    def get_instant(self, t):
+        
+        key = tuple(t)
+        
+        with self.cache_lock:
+            if key in self.instant_cache:
+                self.instant_cache.move_to_end(key)
+                return self.instant_cache[key]
+        
+        utc = self.ts.ut1(t[0],t[1],t[2],t[3],t[4],t[5])
+        earth = self.solar_db['earth'][1]
+        
+        inst = {
+            'utc' : utc,
+            'earth' : earth.at(utc),
+            'gha_a' : 180.0 * utc.gast / 12.0,
+            'observers' : {}
+            }
+        
+        with self.cache_lock:
+            self.instant_cache[key] = inst
+            if len(self.instant_cache) > self.cache_size:
+                self.instant_cache.popitem(last=False)
+        
+        return inst
+    
+    # t: time must be in list format [yyyy,mm,dd,HH,MM,SS]
+    # pos: position must be in format decimal degrees [+-lat, +-long, h]
+    # returns cached observer (topocentric) position at instant t
+    def get_observer(self, t, pos):
+        
+        inst = self.get_instant(t)
+        key = tuple(pos)
+        
+        with self.cache_lock:
+            if key in inst['observers']:
+                return inst['observers'][key]
+        
+        earth = self.solar_db['earth'][1]
+        location = earth + sfa.wgs84.latlon(pos[0], pos[1], pos[2])
+        observer = location.at(inst['utc'])
+        
+        with self.cache_lock:
+            inst['observers'][key] = observer
+        
+        return observer
+    
+    # t: time must be in list format [yyyy,mm,dd,HH,MM,SS]
+    # pos: position must be in format decimal degrees [+-lat, +-long, h]
+    # returns cached observer GCRS position and its horizon rotation at instant t
+    def get_horizon(self, t, pos):
+        
+        inst = self.get_instant(t)
+        key = ('horizon',) + tuple(pos)
+        
+        with self.cache_lock:
+            if key in inst['observers']:
+                return inst['observers'][key]
+        
+        horizon = celobj.get_horizon(inst['utc'], pos)
+        
+        with self.cache_lock:
+            inst['observers'][key] = horizon
+        
+        return horizon
+    
+    # name: celestial object name (star or solar object)
+    # returns [object type, star or planet object] from the objects registry,
+    # object is built on the first use
+    def get_body_object(self, name):
+        
+        if name in self.bodies:
+            return self.bodies[name]
+        
+        with self.load_lock:
+            if not(name in self.bodies):
+                earth = self.solar_db['earth'][1]
+                
+                if name in self.solar:
+                    otype = 'solar'
+                    body = planetobj.PlanetObject(self.solar_db[name][1], self.solar_db[name][2], earth)
+                else:
+                    otype = 'star'
+                    body = starobj.StarObject(name, self.star_db[name][1], earth, self.df)
+                
+                self.bodies[name] = [otype, body]
+        
+        return self.bodies[name]
+
+    # Set vector time object out of list of times [[yyyy,mm,dd,HH,MM,SS], ...]
+    def get_time_series(self, times):
+        
+        if isinstance(times, sftl.Time):
+            return times
+        
+        tt = np.asarray(times, dtype=float)
+        if tt.ndim != 2 or tt.shape[1] != 6:
+            print('Time series size mismatch: shape={:}'.format(tt.shape))
+            raise AssertionError()
+        
+        ti = tt[:,0:5].astype(int)
+        
+        return self.ts.ut1(ti[:,0], ti[:,1], ti[:,2], ti[:,3], ti[:,4], tt[:,5])
 
     # Set star dataframe
+    # Navigational stars and additional stars (star_hips) are extracted from
+    # the Hipparcos catalog into a small binary file on the first load,
+    # later only this subset is loaded
     def get_star_db(self,load):
+        
+        db = 'nav_stars.npz'
+        db_path = self.root_path + '/' + db
+        
+        ns_obj = navstars.NavigationalStar()
+        hips = set(ns_obj.getHIPs()) | set(self.star_hips)
+        
+        if os.path.exists(db_path):
+            df = self.load_star_subset(db_path)
+            if hips.issubset(set(df.index)):
+                return df
+            hips = hips | set(df.index)
             
+        cat = os.path.basename(hipparcos.URL)
+        if self.offline and not(os.path.exists(self.root_path + '/' + cat)):
+            print('  ERROR: Star catalog {:s} is missing in data path {:s} (offline mode)!'.format(cat, self.root_path))
+            raise AssertionError()
+        
         # load the Hipparcos catalog as a 118,218 row Pandas dataframe.
         with load.open(hipparcos.URL) as f:
             df = hipparcos.load_dataframe(f)
         
+        df = df.loc[sorted(hips)]
+        self.save_star_subset(db_path, df)
+        
+        return df
+    
+    # Save star dataframe subset in numpy binary format
+    def save_star_subset(self, db_path, df):
+        
+        data = {'hip' : df.index.to_numpy(dtype=int)}
+        for col in df.columns:
+            data[col] = df[col].to_numpy(dtype=float)
+        
+        self.save_npz(db_path, **data)
+    
+    # Load star dataframe subset from numpy binary format
+    def load_star_subset(self, db_path):
+        
+        import pandas as pd
+        
+        with np.load(db_path) as f:
+            data = {}
+            for col in f.files:
+                if col != 'hip':
+                    data[col] = f[col]
+            df = pd.DataFrame(data, index=pd.Index(f['hip'], name='hip'))
+        
         return df
         
     # Set celestial objects
@@ -319,30 +1027,57 @@ class CelestialData:
         db_path = self.root_path + '/' + db
         
         if not(os.path.exists(db_path)):
+            if self.offline:
+                print('  ERROR: Ephemeris {:s} is missing in data path {:s} (offline mode)!'.format(db, self.root_path))
+                raise AssertionError()
             load.download(db)
             
         eph = load(db)
         
-        earth   = eph['earth']
-        moon    = eph['moon']
-        sun     = eph['sun']
-        venus   = eph['venus']
-        mars    = eph['mars']
-        jupiter = eph['jupiter barycenter']
-        saturn  = eph['saturn barycenter']
-    
         # navigational planets, sun and moon 
+        solar = {}
+        st = self.get_solar_table()
+        for k in st.keys():
+            solar[k] = [st[k][0], eph[st[k][1]], st[k][2]]
+        
+        return [solar,eph]
+    
+    # Solar objects table: [name, ephemeris name, radius in km]
+    def get_solar_table(self):
+        
         solar = {
-            'sun' : ['Sun', sun, 696340.0],
-            'moon' : ['Moon', moon, 1737.1],
-            'venus' : ['Venus', venus, 6051.8],
-            'mars' : ['Mars', mars, 3389.5],
-            'jupiter' : ['Jupiter', jupiter, 69911.0],
-            'saturn' : ['Saturn', saturn, 58232.0],
-            'earth' : ['Earth', earth, 6371.0]
+            'sun' : ['Sun', 'sun', 696340.0],
+            'moon' : ['Moon', 'moon', 1737.1],
+            'venus' : ['Venus', 'venus', 6051.8],
+            'mars' : ['Mars', 'mars', 3389.5],
+            'jupiter' : ['Jupiter', 'jupiter barycenter', 69911.0],
+            'saturn' : ['Saturn', 'saturn barycenter', 58232.0],
+            'earth' : ['Earth', 'earth', 6371.0]
             }
         
-        return [solar,eph]
+        return solar
+    
+    # Loads resource with function fun into attribute attr once (thread safe)
+    # and stores loading time in load report
+    def load_resource(self, name, attr, fun, *args):
+        
+        with self.load_lock:
+            if getattr(self, attr) is None:
+                t0 = time.perf_counter()
+                setattr(self, attr, fun(*args))
+                self.load_report[name] = time.perf_counter() - t0
+        
+        return getattr(self, attr)
+    
+    # Saves arrays into numpy binary file, written into a temporary file first
+    # and then replaced, so other threads and processes never read a partial file
+    def save_npz(self, path, **data):
+        
+        tmp_path = '{:s}.{:d}.{:d}.tmp'.format(path, os.getpid(), threading.get_ident())
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **data)
+        
+        os.replace(tmp_path, path)
         
     
     # Read stars ID from Hipparcos database, to get their astronomical coordinates
@@ -353,13 +1088,23 @@ class CelestialData:
         
         return ns_db
     
+    # Set one star object for all navigational stars (vectorized Star)
+    def get_nav_stars_object(self):
+        
+        earth = self.solar_db['earth'][1]
+        hips = []
+        for k in self.star_db.keys():
+            hips.append(self.star_db[k][1])
+        
+        return starobj.StarObject('navigational stars', hips, earth, self.df)
+    
     def get_celestial_db(self):
         
         data = []
         
-        for k in self.solar_db.keys():
-            if k != 'earth':
-                data.append([k,self.solar_db[k][0]])
+        st = self.get_solar_table()
+        for k in self.solar:
+            data.append([k,st[k][0]])
         
         data.append(["","--------"])
                 
@@ -372,9 +1117,9 @@ class CelestialData:
         
         data = []
         
-        for k in self.solar_db.keys():
-            if k != 'earth':
-                data.append([k,self.solar_db[k][0]])
+        st = self.get_solar_table()
+        for k in self.solar:
+            data.append([k,st[k][0]])
                 
         for k in self.star_db.keys():
                 data.append([k,self.star_db[k][0]])
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 21:05:12 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Observer horizon functions shared by star and planet objects!
+"""
+
+import numpy as np
+
+# Astronomy modules
+import skyfield.api as sfa
+import skyfield.functions as sff
+
+
+# returns observer GCRS position [au] and rotation to its horizon system
+# time t can be a scalar or a vector skyfield time object
+# pos: latitude, longitude in degrees and height in m
+def get_horizon(t, pos):
+
+    topos = sfa.wgs84.latlon(pos[0], pos[1], pos[2])
+
+    return [topos.at(t).xyz.au, topos.rotation_at(t)]
+
+
+# returns altitude and azimuth in degrees of geocentric position xyz [au]
+# seen from the observer (horizon)
+def get_horizon_altaz(xyz, horizon):
+
+    [r_obs, R] = horizon
+    if np.ndim(xyz) > np.ndim(r_obs):
+        r_obs = r_obs[:,None]
+
+    r, alt, az = sff.to_spherical(sff.mxv(R, xyz - r_obs))
+
+    return [np.degrees(alt), np.degrees(az)]
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:10:32 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Geodesic and rhumb line calculations on the WGS84 ellipsoid!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import math as mat
+import numpy as np
+import navtools as nt
+
+
+# WGS84 ellipsoid
+Ra = 6378137.0                # semi-major axis [m]
+Rf = 1/298.257223563          # flattening
+Rb = Ra*(1 - Rf)              # semi-minor axis [m]
+EPS = mat.sqrt(Rf*(2 - Rf))   # eccentricity
+NM = 1852.0                   # nautical mile [m]
+
+# Meridian arc series coefficients (Helmert), third flattening n
+n = Rf/(2 - Rf)
+M_A0 = 1 + n**2/4 + n**4/64
+M_R = Ra/(1 + n)*M_A0                   # rectifying radius [m]
+M_A = [-3/2*(n - n**3/8)/M_A0,          # sin(2 fi)
+       15/16*(n**2 - n**4/4)/M_A0,      # sin(4 fi)
+       -35/48*n**3/M_A0,                # sin(6 fi)
+       315/512*n**4/M_A0]               # sin(8 fi)
+M_B = [3/2*n - 27/32*n**3,              # sin(2 mu), inverse series
+       21/16*n**2 - 55/32*n**4,         # sin(4 mu)
+       151/96*n**3,                     # sin(6 mu)
+       1097/512*n**4]                   # sin(8 mu)
+
+# Supported earth models
+models = ['sphere', 'wgs84']
+
+
+# Checks earth model name
+def checkModel(model):
+
+    if not(model in models):
+        print('Unknown earth model: {:} (use {:})'.format(model, models))
+        raise AssertionError()
+
+
+# Meridional parts in minutes of arc for latitudes fi in decimal degrees
+def meridionalParts(fi):
+
+    fir = np.radians(fi)
+
+    return 10800/mat.pi * (np.arcsinh(np.tan(fir)) - EPS*np.arctanh(EPS*np.sin(fir)))
+
+
+# Meridian arc length from equator in meters for latitudes fi in decimal degrees
+def meridianArc(fi):
+
+    fir = np.radians(fi)
+
+    m = fir
+    for k in range(len(M_A)):
+        m = m + M_A[k]*np.sin(2*(k + 1)*fir)
+
+    return M_R*m
+
+
+# Latitudes in decimal degrees for meridian arc lengths m in meters
+def meridianArcInverse(m):
+
+    mu = np.asarray(m, dtype=float)/M_R
+
+    fir = mu
+    for k in range(len(M_B)):
+        fir = fir + M_B[k]*np.sin(2*(k + 1)*mu)
+
+    return np.degrees(fir)
+
+
+# Calculates geodesic distance and azimuths between positions (inverse
+# problem, Vincenty), inputs in decimal degrees are numpy broadcast
+# returns arrays [distance Nm, initial azimuth, final azimuth]
+# positions where the iteration does not converge (nearly antipodal) are
+# solved by bisection of the initial azimuth, identical positions give nan
+# azimuths
+def inverse(fi0, la0, fi1, la1, tol=1e-12, max_iter=200):
+
+    U1 = np.arctan((1 - Rf)*np.tan(np.radians(fi0)))
+    U2 = np.arctan((1 - Rf)*np.tan(np.radians(fi1)))
+    L = np.radians(nt.deltaLongArray(la0, la1))
+
+    [U1, U2, L] = np.broadcast_arrays(U1, U2, L)
+    sinU1 = np.sin(U1)
+    cosU1 = np.cos(U1)
+    sinU2 = np.sin(U2)
+    cosU2 = np.cos(U2)
+
+    # only positions which have not converged yet are iterated
+    lam = L.copy()
+    act = np.ones(L.shape, dtype=bool)
+    for i in range(max_iter):
+        lam_p = lam[act]
+        lam_n = getInverseLambda(L[act], lam_p, sinU1[act], cosU1[act], sinU2[act], cosU2[act])
+        lam[act] = lam_n
+
+        act[act] = np.fabs(lam_n - lam_p) >= tol
+        if not(np.any(act)):
+            break
+
+    [sin_s, cos_s, s, sin_a, cos2_a, cos_2sm] = getInverseTerms(lam, sinU1, cosU1, sinU2, cosU2)
+
+    u2 = cos2_a*(Ra**2 - Rb**2)/Rb**2
+    A = 1 + u2/16384*(4096 + u2*(-768 + u2*(320 - 175*u2)))
+    B = u2/1024*(256 + u2*(-128 + u2*(74 - 47*u2)))
+    ds = B*sin_s*(cos_2sm + B/4*(cos_s*(-1 + 2*cos_2sm**2) - B/6*cos_2sm*(-3 + 4*sin_s**2)*(-3 + 4*cos_2sm**2)))
+
+    d = Rb*A*(s - ds)/NM
+
+    sin_lam = np.sin(lam)
+    cos_lam = np.cos(lam)
+    a1 = np.degrees(np.arctan2(cosU2*sin_lam, cosU1*sinU2 - sinU1*cosU2*cos_lam))
+    a2 = np.degrees(np.arctan2(cosU1*sin_lam, -sinU1*cosU2 + cosU1*sinU2*cos_lam))
+
+    act = act | ~(np.fabs(lam) <= mat.pi)
+    if np.any(act):
+        [d, a1, a2] = [np.array(d), np.array(a1), np.array(a2)]
+        [d[act], a1[act], a2[act]] = inverseBisection(U1[act], U2[act], L[act])
+
+    a1 = np.where(d == 0, np.nan, a1)
+    a2 = np.where(d == 0, np.nan, a2)
+
+    return [d, np.mod(a1, 360.0), np.mod(a2, 360.0)]
+
+
+# Calculates positions at geodesic distances d [Nm] from fi0, la0 with
+# initial azimuths c [deg] (direct problem, Vincenty), inputs are numpy broadcast
+# returns arrays [fi1, la1, final azimuth]
+def direct(fi0, la0, c, d, tol=1e-12, max_iter=200):
+
+    U1 = np.arctan((1 - Rf)*np.tan(np.radians(fi0)))
+    a1 = np.radians(c)
+    s = np.asarray(d, dtype=float)*NM
+
+    [U1, a1, s] = np.broadcast_arrays(U1, a1, s)
+
+    s1 = np.arctan2(np.tan(U1), np.cos(a1))
+    sin_a = np.cos(U1)*np.sin(a1)
+    cos2_a = 1 - sin_a**2
+
+    u2 = cos2_a*(Ra**2 - Rb**2)/Rb**2
+    A = 1 + u2/16384*(4096 + u2*(-768 + u2*(320 - 175*u2)))
+    B = u2/1024*(256 + u2*(-128 + u2*(74 - 47*u2)))
+
+    sig = s/(Rb*A)
+    for i in range(max_iter):
+        cos_2sm = np.cos(2*s1 + sig)
+        sin_s = np.sin(sig)
+        cos_s = np.cos(sig)
+        ds = B*sin_s*(cos_2sm + B/4*(cos_s*(-1 + 2*cos_2sm**2) - B/6*cos_2sm*(-3 + 4*sin_s**2)*(-3 + 4*cos_2sm**2)))
+        sig_p = sig
+        sig = s/(Rb*A) + ds
+
+        if np.all(np.fabs(sig - sig_p) < tol):
+            break
+
+    [fi1, dla, a2] = getAuxPosition(U1, a1, s1, sig)
+
+    return [fi1, wrapLong(la0 + dla), a2]
+
+
+# Calculates the geodesic vertex (highest latitude reached) from fi0, la0
+# in direction of initial azimuths c [deg], inputs are numpy broadcast
+# returns arrays [vertex lat, vertex long]
+def vertex(fi0, la0, c):
+
+    U1 = np.arctan((1 - Rf)*np.tan(np.radians(fi0)))
+    a1 = np.radians(c)
+
+    [U1, a1] = np.broadcast_arrays(U1, a1)
+
+    s1 = np.arctan2(np.tan(U1), np.cos(a1))
+    sig = np.mod(mat.pi/2 - s1, mat.pi) # first vertex in direction of azimuth
+
+    [fiv, dla, a2] = getAuxPosition(U1, a1, s1, sig)
+
+    return [fiv, wrapLong(la0 + dla)]
+
+
+# Calculates rhumb line distance [Nm] and course [deg] between positions
+# on the ellipsoid, inputs in decimal degrees are numpy broadcast
+def rhumbInverse(fi0, la0, fi1, la1):
+
+    [fi0, la0, fi1, la1] = np.broadcast_arrays(np.asarray(fi0, dtype=float), np.asarray(la0, dtype=float),
+                                               np.asarray(fi1, dtype=float), np.asarray(la1, dtype=float))
+
+    dlr = np.radians(nt.deltaLongArray(la0, la1))
+    dm = meridianArc(fi1) - meridianArc(fi0)
+
+    # departure is the longitude difference on the rhumb radius
+    p = dlr*getRhumbRadius(fi0, fi1)
+    cr = np.arctan2(p, dm)
+
+    return [np.hypot(dm, p)/NM, np.mod(np.degrees(cr), 360.0)]
+
+
+# Calculates positions at rhumb line distances d [Nm] from fi0, la0 with
+# courses c [deg] on the ellipsoid, inputs are numpy broadcast
+# returns arrays [fi1, la1]
+def rhumbDirect(fi0, la0, c, d):
+
+    [fi0, la0, c, d] = np.broadcast_arrays(np.asarray(fi0, dtype=float), np.asarray(la0, dtype=float),
+                                           np.asarray(c, dtype=float), np.asarray(d, dtype=float))
+
+    cr = np.radians(c)
+    s = d*NM
+
+    fi1 = meridianArcInverse(meridianArc(fi0) + s*np.cos(cr))
+    dlr = s*np.sin(cr)/getRhumbRadius(fi0, fi1)
+
+    return [fi1, wrapLong(la0 + np.degrees(dlr))]
+
+
+# ***************************
+# **** Private functions ****
+# ***************************
+
+# Calculates arc terms of the inverse problem for longitude difference lam
+# on the auxiliary sphere
+def getInverseTerms(lam, sinU1, cosU1, sinU2, cosU2):
+
+    sin_lam = np.sin(lam)
+    cos_lam = np.cos(lam)
+    sin_s = np.hypot(cosU2*sin_lam, cosU1*sinU2 - sinU1*cosU2*cos_lam)
+    cos_s = sinU1*sinU2 + cosU1*cosU2*cos_lam
+    s = np.arctan2(sin_s, cos_s)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sin_a = np.where(sin_s == 0, 0.0, cosU1*cosU2*sin_lam/sin_s)
+        cos2_a = 1 - sin_a**2
+        cos_2sm = np.where(cos2_a == 0, 0.0, cos_s - 2*sinU1*sinU2/cos2_a)
+
+    return [sin_s, cos_s, s, sin_a, cos2_a, cos_2sm]
+
+
+# Next iteration of longitude difference on the auxiliary sphere
+def getInverseLambda(L, lam, sinU1, cosU1, sinU2, cosU2):
+
+    [sin_s, cos_s, s, sin_a, cos2_a, cos_2sm] = getInverseTerms(lam, sinU1, cosU1, sinU2, cosU2)
+
+    C = Rf/16*cos2_a*(4 + Rf*(4 - 3*cos2_a))
+
+    return L + (1 - C)*Rf*sin_a*(s + C*sin_s*(cos_2sm + C*cos_s*(-1 + 2*cos_2sm**2)))
+
+
+# Solves the inverse problem by bisection of the initial azimuth, robust
+# also for nearly antipodal positions (Karney, Algorithms for geodesics)
+# positions are mapped to the canonical form U1 <= 0, |U2| <= |U1|, L >= 0,
+# where longitude difference is increasing with initial azimuth in [0, pi]
+# U1, U2: reduced latitudes, L: longitude difference [rad] (arrays)
+# returns arrays [distance Nm, initial azimuth, final azimuth] in degrees
+def inverseBisection(U1, U2, L, n_iter=64):
+
+    swap = np.fabs(U1) < np.fabs(U2)
+    [U1, U2] = [np.where(swap, U2, U1), np.where(swap, U1, U2)]
+    L = np.where(swap, -L, L)
+
+    south = U1 > 0
+    U1 = -np.fabs(U1)
+    U2 = np.where(south, -U2, U2)
+
+    west = L < 0
+    L = np.fabs(L)
+
+    lo = np.zeros(L.shape)
+    hi = np.full(L.shape, mat.pi)
+    for i in range(n_iter):
+        a1 = 0.5*(lo + hi)
+        [lam, s, a2] = getCanonicalTerms(U1, U2, a1)
+        low = lam < L
+        lo = np.where(low, a1, lo)
+        hi = np.where(low, hi, a1)
+
+    a1 = 0.5*(lo + hi)
+    [lam, s, a2] = getCanonicalTerms(U1, U2, a1)
+
+    a1 = np.where(west, -a1, a1)
+    a2 = np.where(west, -a2, a2)
+    a1 = np.where(south, mat.pi - a1, a1)
+    a2 = np.where(south, mat.pi - a2, a2)
+    [a1, a2] = [np.where(swap, a2 + mat.pi, a1), np.where(swap, a1 + mat.pi, a2)]
+
+    return [Rb*s/NM, np.degrees(a1), np.degrees(a2)]
+
+
+# Calculates the geodesic in canonical form (see inverseBisection) from
+# reduced latitude U1 with initial azimuth a1 to reduced latitude U2
+# returns [longitude difference, distance/semi-minor axis, final azimuth]
+def getCanonicalTerms(U1, U2, a1):
+
+    sin_a0 = np.sin(a1)*np.cos(U1)
+    cos2_a = 1 - sin_a0**2
+    cos_a2 = np.sqrt(np.maximum((np.cos(a1)*np.cos(U1))**2 + np.cos(U2)**2 - np.cos(U1)**2, 0.0))/np.cos(U2)
+
+    s1 = np.arctan2(np.sin(U1), np.cos(a1)*np.cos(U1))
+    s2 = np.arctan2(np.sin(U2), cos_a2*np.cos(U2))
+    w1 = np.arctan2(sin_a0*np.sin(U1), np.cos(a1)*np.cos(U1))
+    w2 = np.arctan2(sin_a0*np.sin(U2), cos_a2*np.cos(U2))
+
+    sig = s2 - s1
+    sin_s = np.sin(sig)
+    cos_s = np.cos(sig)
+    cos_2sm = np.cos(s1 + s2)
+
+    C = Rf/16*cos2_a*(4 + Rf*(4 - 3*cos2_a))
+    lam = (w2 - w1) - (1 - C)*Rf*sin_a0*(sig + C*sin_s*(cos_2sm + C*cos_s*(-1 + 2*cos_2sm**2)))
+
+    u2 = cos2_a*(Ra**2 - Rb**2)/Rb**2
+    A = 1 + u2/16384*(4096 + u2*(-768 + u2*(320 - 175*u2)))
+    B = u2/1024*(256 + u2*(-128 + u2*(74 - 47*u2)))
+    ds = B*sin_s*(cos_2sm + B/4*(cos_s*(-1 + 2*cos_2sm**2) - B/6*cos_2sm*(-3 + 4*sin_s**2)*(-3 + 4*cos_2sm**2)))
+
+    a2 = np.arctan2(sin_a0/np.cos(U2), cos_a2)
+
+    return [lam, A*(sig - ds), a2]
+
+
+# Calculates position on the auxiliary sphere at arc sig from reduced
+# latitude U1 with azimuth a1, s1 is the arc from the equator
+# returns [latitude, delta longitude, azimuth] in degrees
+def getAuxPosition(U1, a1, s1, sig):
+
+    sinU1 = np.sin(U1)
+    cosU1 = np.cos(U1)
+    sin_a1 = np.sin(a1)
+    cos_a1 = np.cos(a1)
+    sin_s = np.sin(sig)
+    cos_s = np.cos(sig)
+
+    sin_a = cosU1*sin_a1
+    cos2_a = 1 - sin_a**2
+    cos_2sm = np.cos(2*s1 + sig)
+
+    x = sinU1*sin_s - cosU1*cos_s*cos_a1
+    fi = np.arctan2(sinU1*cos_s + cosU1*sin_s*cos_a1, (1 - Rf)*np.hypot(sin_a, x))
+    lam = np.arctan2(sin_s*sin_a1, cosU1*cos_s - sinU1*sin_s*cos_a1)
+
+    C = Rf/16*cos2_a*(4 + Rf*(4 - 3*cos2_a))
+    L = lam - (1 - C)*Rf*sin_a*(sig + C*sin_s*(cos_2sm + C*cos_s*(-1 + 2*cos_2sm**2)))
+
+    a2 = np.arctan2(sin_a, -x)
+
+    return [np.degrees(fi), np.degrees(L), np.mod(np.degrees(a2), 360.0)]
+
+
+# Rhumb radius [m], ratio of meridian arc and meridional parts differences
+# between latitudes fi0, fi1 in decimal degrees (departure per longitude
+# difference in radians), for small latitude differences the ratio loses
+# precision and the series at the middle latitude is used (see
+# rhumbline.getCosTildeLat)
+def getRhumbRadius(fi0, fi1):
+
+    fi0 = np.asarray(fi0, dtype=float)
+    fi1 = np.asarray(fi1, dtype=float)
+
+    dfr = np.radians(fi1 - fi0)
+    fmr = np.radians(fi0 + fi1)/2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        q = (meridianArc(fi1) - meridianArc(fi0))/np.radians(meridionalParts(fi1) - meridionalParts(fi0))*60
+        q_m = getParallelRadius(np.degrees(fmr))/(1 + dfr**2*(np.tan(fmr)**2 + 1/np.cos(fmr)**2)/24)
+
+    return np.where(np.fabs(dfr) < 1e-4, q_m, q)
+
+
+# Radius of parallel at latitudes fi in decimal degrees [m]
+def getParallelRadius(fi):
+
+    fir = np.radians(fi)
+
+    return Ra*np.cos(fir)/np.sqrt(1 - EPS**2*np.sin(fir)**2)
+
+
+# Maps longitudes into [-180,180)
+def wrapLong(la):
+
+    return np.mod(np.asarray(la, dtype=float) + 180.0, 360.0) - 180.0
@@ -14,6 +14,7 @@ sys.path.append('../nav_tools')
 import math as mat
 import numpy as np
 import navtools as nt
+import geodesic as gd
 
 
 # Calculates the midpoint longitude on orthodrome
@@ -33,7 +34,14 @@ def getMidpointLong(la_1d, dl_m):
 
 # Calculates first orthodrome parameters
 # distance, departure course, vertex position
-def getGCparameters(p0,p1):
+# model: 'sphere' or 'wgs84' (geodesic on the ellipsoid)
+def getGCparameters(p0,p1,model='sphere'):
+
+    gd.checkModel(model)
+    if model == 'wgs84':
+        [d, w1, w2] = gd.inverse(p0[0], p0[1], p1[0], p1[1])
+        [fiv, lav] = gd.vertex(p0[0], p0[1], w1)
+        return [float(d),float(w1),[float(fiv),float(lav)]]
 
     # Covert to radians
     fi0r = nt.deg2rad(p0[0])
@@ -68,10 +76,80 @@ def getGCparameters(p0,p1):
     return [d,w1,[fiv,lav]]
 
 
+# Calculates orthodrome parameters for all pairs of positions
+# P0: positions array (N,2), P1: positions array (M,2), decimal degrees
+# returns arrays (N,M): [distance, departure course, vertex lat, vertex long]
+# same formulas as getGCparameters, date line crossing is handled by
+# deltaLongArray; identical positions give nan course and vertex
+# model: 'sphere' or 'wgs84' (geodesic on the ellipsoid)
+def getGCparametersArray(P0,P1,model='sphere'):
+
+    P0 = np.asarray(P0, dtype=float).reshape(-1,2)
+    P1 = np.asarray(P1, dtype=float).reshape(-1,2)
+
+    gd.checkModel(model)
+    if model == 'wgs84':
+        [d, w1, w2] = gd.inverse(P0[:,0][:,None], P0[:,1][:,None], P1[:,0][None,:], P1[:,1][None,:])
+        [fiv, lav] = gd.vertex(P0[:,0][:,None], P0[:,1][:,None], w1)
+        return [d, w1, fiv, lav]
+
+    fi0r = nt.deg2rad(P0[:,0])[:,None]
+    psi0r = mat.pi/2 - fi0r
+    la0d = P0[:,1][:,None]
+    fi1r = nt.deg2rad(P1[:,0])[None,:]
+    psi1r = mat.pi/2 - fi1r
+
+    dlar = nt.deg2rad(nt.deltaLongArray(la0d, P1[:,1][None,:]))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Find distance
+        cos_d = np.cos(psi0r) * np.cos(psi1r) + np.sin(psi0r) * np.sin(psi1r) * np.cos(np.fabs(dlar))
+        dr = np.arccos(np.clip(cos_d, -1.0, 1.0))
+        d = nt.rad2deg(dr)*60
+
+        # Find departure course
+        cos_w = (np.cos(psi1r) - np.cos(psi0r) * np.cos(dr))/(np.sin(psi0r) * np.sin(dr))
+        w = np.arccos(np.clip(cos_w, -1.0, 1.0))
+        w1 = np.where(dlar < 0, 360 - nt.rad2deg(w), nt.rad2deg(w))
+
+        # Vertex latitude
+        fivr = np.sign(np.cos(w)) * np.arccos(np.fabs(np.sin(w)) * np.cos(fi0r))
+        fiv = nt.rad2deg(fivr)
+
+        # Vertex longitude
+        pivr = np.sign(dlar) * np.arccos(np.clip(np.tan(fi0r)/np.tan(fivr), -1.0, 1.0))
+        lav = la0d + nt.rad2deg(pivr)
+        lav = np.where(lav < -180.0, 360 + lav, np.where(lav > 180.0, lav - 360, lav))
+
+    return [d, w1, fiv, lav]
+
+
+# Calculates orthodrome parameters for all pairs of positions in blocks
+# nrow x ncol, memory is bounded by the block size
+# yields [i, j, params]: params of P0[i:i+nrow] and P1[j:j+ncol], see
+# getGCparametersArray
+def getGCparametersChunks(P0,P1,nrow=1000,ncol=10000,model='sphere'):
+
+    P0 = np.asarray(P0, dtype=float).reshape(-1,2)
+    P1 = np.asarray(P1, dtype=float).reshape(-1,2)
+
+    for i in range(0, len(P0), nrow):
+        for j in range(0, len(P1), ncol):
+            yield [i, j, getGCparametersArray(P0[i:i+nrow], P1[j:j+ncol], model)]
+
+
 # Get midpoint position on the orthdrome path
 # Input for midpoit position is longitude in decimal degrees
 def getMidPosition(P0,P1,la_md):
     
+    return float(getMidPositions(P0, P1, np.array([la_md]))[0])
+
+
+# Get midpoint positions on the orthdrome path for array of longitudes
+# GC parameters are computed once, latitudes in one array expression
+# Input for midpoint positions are longitudes in decimal degrees
+def getMidPositions(P0,P1,la_md):
+    
     [d_gc, w1_gc, [fiv_gc, lav_gc]] = getGCparameters(P0, P1)
     
     fi_0r = nt.deg2rad(P0[0])
@@ -83,38 +161,80 @@ def getMidPosition(P0,P1,la_md):
     else:
         w = nt.deg2rad(w1_gc)
     
-    # find midpoint latitude using P_0 (stable)
-    dla_mr = mat.fabs(nt.deg2rad(nt.deltaLong(P0[1], la_md)));
+    # find midpoint latitudes using P_0 (stable)
+    dla_mr = np.fabs(np.radians(nt.deltaLongArray(P0[1], la_md)))
     if (fi_0r < 0):
         w = mat.pi - w
         fi_0r = mat.fabs(fi_0r)
-        fi_mr = mat.atan( mat.sin(dla_mr) / (mat.tan(w) * mat.cos(fi_0r)) + mat.tan(fi_0r) * mat.cos(dla_mr) )
-        fi_mr = - fi_mr
+        fi_mr = - np.arctan( np.sin(dla_mr) / (mat.tan(w) * mat.cos(fi_0r)) + mat.tan(fi_0r) * np.cos(dla_mr) )
     else:
-        fi_mr = mat.atan( mat.sin(dla_mr) / (mat.tan(w) * mat.cos(fi_0r)) + mat.tan(fi_0r) * mat.cos(dla_mr) );
+        fi_mr = np.arctan( np.sin(dla_mr) / (mat.tan(w) * mat.cos(fi_0r)) + mat.tan(fi_0r) * np.cos(dla_mr) )
+    
+    return np.degrees(fi_mr)
+
+
+# Calculates positions on orthodrome from P0 with departure course c [deg]
+# at distances d in Nm (scalar or numpy array), direct problem
+# model: 'sphere' or 'wgs84' (geodesic on the ellipsoid)
+def getPositionsAtDistance(P0,c,d,model='sphere'):
+
+    gd.checkModel(model)
+    if model == 'wgs84':
+        [fi, la, c2] = gd.direct(P0[0], P0[1], c, d)
+        return np.transpose(np.array([fi, la]))
+    
+    fi_0r = mat.radians(P0[0])
+    cr = mat.radians(c)
+    dr = np.radians(np.asarray(d, dtype=float)/60.0)
+    
+    sin_fi = mat.sin(fi_0r) * np.cos(dr) + mat.cos(fi_0r) * np.sin(dr) * mat.cos(cr)
+    fi_r = np.arcsin(np.clip(sin_fi, -1.0, 1.0))
+    dla_r = np.arctan2(mat.sin(cr) * np.sin(dr) * mat.cos(fi_0r), np.cos(dr) - mat.sin(fi_0r) * sin_fi)
     
-    fi_md = nt.rad2deg(fi_mr)
+    la = np.mod(P0[1] + np.degrees(dla_r) + 180.0, 360.0) - 180.0
     
-    return fi_md
+    return np.transpose(np.array([np.degrees(fi_r), la]))
 
 
 # Calculates set of midpoints on orthodrome path
 # dla specifies delta lambda: normally 5,10 deg
 def getPathPoints(P0,P1,dla=1):
     
-    la_mps = nt.getPathPointsLong(P0[1], P1[1], dla)
-    
-    fi_mps = []
-    for la in la_mps:
-        fi_i = getMidPosition(P0, P1, la)
-        fi_mps.append(fi_i)
+    la_mps = np.array(nt.getPathPointsLong(P0[1], P1[1], dla))
+    fi_mps = getMidPositions(P0, P1, la_mps)
         
     return np.transpose(np.array([fi_mps, la_mps]))
 
 
+# Calculates set of points on orthodrome path at equal distances
+# dd specifies distance between points in Nm, last leg can be shorter
+# model: 'sphere' or 'wgs84' (geodesic on the ellipsoid)
+def getPathPointsDist(P0,P1,dd,model='sphere'):
+    
+    [d_gc, w1_gc, pv_gc] = getGCparameters(P0, P1, model)
+    
+    d = np.append(np.arange(0.0, d_gc, dd), d_gc)
+    pts = getPositionsAtDistance(P0, w1_gc, d, model)
+    pts[0] = P0[:2]
+    pts[-1] = P1[:2]
+    
+    return dropDuplicatePoints(pts)
+
+
 # Converts GC path to a piecewise RL lines
 def convertGC2RL(P0,P1,dla):
     
-    Pm = getMidPoints(P0, P1, dla)
-    return np.concatenate(([P0],Pm,[P1]))
+    Pm = getPathPoints(P0, P1, dla)[1:-1]
+    pts = np.concatenate(([P0[:2]],Pm,[P1[:2]]))
+    
+    return dropDuplicatePoints(pts)
+
+
+# Drops waypoints equal to the previous one, they give zero length RL legs
+def dropDuplicatePoints(pts):
+    
+    pts = np.asarray(pts, dtype=float)
+    same = np.all(pts[1:] == pts[:-1], axis=1)
+    
+    return pts[np.concatenate(([True], ~same))]
     
\ No newline at end of file
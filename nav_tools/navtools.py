@@ -24,6 +24,9 @@ u_lambda = '\u03BB'
 u_omega = '\u03C9'
 u_delta = '\u03C9'
 
+# Code points of non-digit characters in angle strings (see parseDMArray)
+dm_codes = [ord(ch) for ch in ' \t.,;:=-+[]\'"NSEW' + arc_deg + arc_min + long_minus + '\u2033' + u_varphi + u_lambda]
+
 
 # Pretty print of degrees minutes form
 def prettyPrintDM(x,z):
@@ -132,12 +135,132 @@ def printPosition(fi, la):
     return '{:s}={:s}; {:s}={:s}'.format(u_varphi, fi_str, u_lambda, la_str)
 
 
+# *** Bulk formatting of arrays, same text as pretty print functions ***
+
+# Rounds values to hundredths as '{:.2f}' format does, returns integers
+def roundHundredths(x):
+    
+    y = x*100.0
+    c = np.floor(y + 0.5)
+    
+    # values close to the half are rounded by the format itself
+    amb = np.fabs(y - np.floor(y) - 0.5) < 1e-6
+    if np.any(amb):
+        c[amb] = [round(float('{:.2f}'.format(v))*100) for v in x[amb]]
+    
+    return c.astype(np.int64)
+
+
+# Builds strings of degrees minutes form 'DD°MM.mm′' from integer degrees
+# x_d and minutes x_m, z is the number of degree digits
+def getDMStrings(x_d, x_m, z):
+    
+    nn = len(x_d)
+    c = roundHundredths(x_m)
+    mi = c // 100
+    mf = c % 100
+    
+    codes = np.empty((nn, z + 7), dtype=np.uint32)
+    for j in range(z):
+        codes[:,j] = 48 + (x_d // 10**(z - j - 1)) % 10
+    codes[:,z] = ord(arc_deg)
+    codes[:,z+1] = 48 + mi // 10
+    codes[:,z+2] = 48 + mi % 10
+    codes[:,z+3] = ord('.')
+    codes[:,z+4] = 48 + mf // 10
+    codes[:,z+5] = 48 + mf % 10
+    codes[:,z+6] = ord(arc_min)
+    
+    return codes.view('<U{:d}'.format(z + 7)).reshape(nn)
+
+
+# Pretty print of degrees minutes form for arrays, see prettyPrintDM
+# the 60' carry is the same as in prettyPrintDM
+def prettyPrintDMArray(x,z):
+    
+    x = np.asarray(x, dtype=float)
+    shape = x.shape
+    x = np.fabs(x).ravel()
+    
+    if z != 3:
+        z = 2
+    
+    x_d = np.floor(x)
+    x_m = (x - x_d)*60.0
+    
+    carry = np.fabs(60.0 - x_m) < 1e-3
+    x_d = np.where(carry, x_d + 1, x_d).astype(np.int64)
+    x_m = np.where(carry, 0.0, x_m)
+    
+    if np.any(x_d >= 10**z): # wider degrees, formatted one by one
+        return np.array([prettyPrintDM(v,z) for v in x]).reshape(shape)
+    
+    return getDMStrings(x_d, x_m, z).reshape(shape)
+
+
+# Pretty print of latitudes for arrays, see prettyPrintLat
+def prettyPrintLatArray(x):
+    
+    x = np.asarray(x, dtype=float)
+    
+    return np.char.add(prettyPrintDMArray(x,2), np.where(x > 0, 'N', 'S'))
+
+
+# Pretty print of longitudes for arrays, see prettyPrintLong
+def prettyPrintLongArray(x):
+    
+    x = np.asarray(x, dtype=float)
+    
+    return np.char.add(prettyPrintDMArray(x,3), np.where(x > 0, 'E', 'W'))
+
+
+# Pretty print of altitudes for arrays, see prettyPrintAlt
+def prettyPrintAltArray(x):
+    
+    x = np.asarray(x, dtype=float)
+    shape = x.shape
+    x = x.ravel()
+    
+    x_sgn = np.sign(x)
+    x = np.fabs(x)
+    x_d = np.floor(x)
+    x_m = (x - x_d)*60.0
+    
+    carry = (60.0 - x_m) < 1e-5
+    x_d = np.where(carry, x_d + 1, x_d).astype(np.int64)
+    x_m = np.where(carry, 0.0, x_m)
+    
+    if np.any(x_d >= 100): # wider degrees, formatted one by one
+        return np.array([prettyPrintAlt(v) for v in x_sgn*x]).reshape(shape)
+    
+    fmt_str = np.char.add(np.where(x_sgn > 0.0, '', '-'), getDMStrings(x_d, x_m, 2))
+    
+    return fmt_str.reshape(shape)
+
+
+# Print positions of decimal degree coordinates for arrays, see printPosition
+def printPositionArray(fi, la):
+    
+    fi_str = prettyPrintLatArray(fi)
+    la_str = prettyPrintLongArray(la)
+    
+    fmt_str = np.char.add(u_varphi + '=', fi_str)
+    fmt_str = np.char.add(fmt_str, '; ' + u_lambda + '=')
+    
+    return np.char.add(fmt_str, la_str)
+
+
 # Converts angle specified in:
 #  -> [deg, min.dec]
 #  -> [deg, min, sec.dec]
 #  in decimal degrees
+# Arrays are specified along the last axis (N,2) or (N,3), lists are
+# converted to arrays, e.g. [[41,45],[12,30]] gives [41.75, 12.5]
 def dms2dd(x):
     
+    if not(np.ndim(x) == 1 and isScalar(*x)):
+        return dms2ddArray(x)
+    
     sgn = np.sign(x[0])
     if len(x) == 2:
         return sgn*( mat.fabs(x[0]) + mat.fabs(x[1])/60.0)
@@ -148,9 +271,39 @@ def dms2dd(x):
         raise AssertionError()
 
 
+# Converts arrays of angles specified in degrees, minutes (and seconds) in
+# decimal degrees, see dms2dd
+def dms2ddArray(x):
+    
+    xa = np.asarray(x, dtype=float)
+    
+    nn = xa.shape[-1]
+    sgn = np.sign(xa[...,0])
+    if nn == 2:
+        return sgn*( np.fabs(xa[...,0]) + np.fabs(xa[...,1])/60.0)
+    elif nn == 3:
+        return sgn*( np.fabs(xa[...,0]) + np.fabs(xa[...,1])/60.0 + np.fabs(xa[...,2])/3600.0)
+    else:
+        print('Input size mismatch: len(x)={:d}'.format(nn))
+        raise AssertionError()
+
+
 # Converts angle specified in decimal degrees to degrees, minutes and seconds in decimal degrees
+# x can be a numpy array, results are arrays then
 def dd2dms(x, ss=False):
     
+    if not(isScalar(x)):
+        sgn = np.sign(x)
+        x = np.fabs(x)
+        dd = np.floor(x)
+        if ss:
+            mm = np.floor((x-dd)*60)
+            ss = (x - dd - mm/60)*60
+        else:
+            mm = (x-dd)*60
+            ss = np.zeros(np.shape(x))
+        return [sgn*dd, mm, ss]
+    
     sgn = np.sign(x)
     x = mat.fabs(x)
     dd = mat.floor(x)
@@ -164,6 +317,8 @@ def dd2dms(x, ss=False):
     return [sgn*dd, mm, ss]
     
 # Converts navigational format to decimal degree format
+# x = [deg, min, orientation], items can be arrays of equal shape
+# sign is the orientation sign (also for 0 degrees) times sign of degrees
 def nav2dd(x):
     
     nn = len(x)
@@ -175,18 +330,219 @@ def nav2dd(x):
     m = x[1]
     o = x[2]
     
+    if not(isScalar(d, m, o)):
+        o = np.asarray(o)
+        if not(np.all(np.isin(o, ['N','S','E','W']))):
+            print('Wrong position orientation: {:}'.format(o[~np.isin(o, ['N','S','E','W'])]))
+            raise AssertionError()
+        d = np.asarray(d, dtype=float)
+        sgn = np.where((o == 'S') | (o == 'W'), -1.0, 1.0)*np.where(d < 0, -1.0, 1.0)
+        return sgn*(np.fabs(d) + np.fabs(np.asarray(m, dtype=float))/60.0)
+    
     if (o == 'S') or (o == 'W'):
-        d = -d
+        sgn = -1
     elif (o == 'N') or (o == 'E'):
-        d = d
+        sgn = 1
     else:
         print('Wrong position orientation: {:}'.format(o))
         raise AssertionError()
+    
+    if d < 0:
+        sgn = -sgn
+    
+    return np.float64(sgn*(mat.fabs(d) + mat.fabs(m)/60.0))
+
+
+# Parses arrays of angle strings in decimal degrees
+# Accepted forms: "41°45.00′N", "041°45.00′W", "41 45.0 S", "[41, 45.0, 'N']",
+# "-12°30.00′", "41°45′30.0″E", "N41 45.0"; numbers are degrees, minutes and
+# seconds, single number with 4 or more integer digits is NMEA ddmm.mm or
+# dddmm.mm ("4145.00,N", "01230.00E"); sign is given by leading or trailing
+# orientation N/S/E/W or by leading minus
+# Strings without numbers or of other forms, minutes or seconds over 60 and
+# angles over 90 (N/S) or 180 (E/W) degrees give nan
+def parseDMArray(s):
+    
+    s = np.asarray(s, dtype=str)
+    shape = s.shape
+    
+    return parseDMCodes(getStringCodes(s.ravel())).reshape(shape)
+
+
+# Parses arrays of position strings "φ=41°45.00′N; λ=012°30.00′E" (see
+# printPosition), "41°45.00′N 012°30.00′E", "N41 45.0 W012 30.0" or NMEA
+# "4145.00,N,01230.00,E" in decimal degrees [fi, la], see parseDMArray
+# latitudes over 90 and longitudes over 180 degrees give nan
+def parsePositionArray(s):
+    
+    s = np.asarray(s, dtype=str)
+    shape = s.shape
+    s = s.ravel()
+    nn = len(s)
+    
+    c = getStringCodes(s)
+    fi = np.full(nn, np.nan)
+    la = np.full(nn, np.nan)
+    
+    # printPosition layout is split by columns
+    std = np.zeros(nn, dtype=bool)
+    if c.shape[1] >= 27:
+        std = (c[:,1] == ord('=')) & (c[:,12] == ord(';')) & (c[:,15] == ord('='))
+        std = std & ((c.shape[1] == 27) | (c[:,min(27, c.shape[1]-1)] == 0))
+        fi[std] = parseDMCodes(c[std,2:12])
+        la[std] = parseDMCodes(c[std,16:27])
+    
+    other = ~std
+    if np.any(other):
+        t = np.char.strip(s[other])
+        p = np.char.partition(t, ';')
+        
+        # positions without separator are split after the first N/S letter,
+        # or before the first E/W letter when orientation letters are leading
+        lead = np.char.startswith(t, 'N') | np.char.startswith(t, 'S')
+        nosep = (p[:,1] == '')
+        for [o, x] in [['N', 'S'], ['S', 'N'], ['E', 'W'], ['W', 'E']]:
+            fo = np.char.find(t, o)
+            fx = np.char.find(t, x)
+            split = nosep & (fo >= 0) & ((fx < 0) | (fo < fx)) & (lead == (o in 'EW'))
+            q = np.char.partition(t, o)
+            if o in 'EW':
+                q[:,2] = np.char.add(q[:,1], q[:,2])
+            else:
+                q[:,0] = np.char.add(q[:,0], q[:,1])
+            p[:,0] = np.where(split, q[:,0], p[:,0])
+            p[:,2] = np.where(split, q[:,2], p[:,2])
+            nosep = nosep & ~split
+        
+        fi[other] = parseDMCodes(getStringCodes(p[:,0]))
+        la[other] = parseDMCodes(getStringCodes(p[:,2]))
+    
+    fi[np.fabs(fi) > 90.0] = np.nan
+    la[np.fabs(la) > 180.0] = np.nan
+    
+    return [fi.reshape(shape), la.reshape(shape)]
+
+
+# returns code points array (N,L) of strings array (N,), padded with 0
+def getStringCodes(s):
+    
+    s = np.ascontiguousarray(np.asarray(s, dtype=str))
+    nn = len(s)
+    
+    if nn == 0 or s.itemsize == 0:
+        return np.zeros((nn, 1), dtype=np.uint32)
+    
+    return s.view(np.uint32).reshape(nn, -1)
+
+
+# Parses angles from code points array (N,L), see parseDMArray
+def parseDMCodes(c):
+    
+    nn = len(c)
+    dd = np.full(nn, np.nan)
+    ll = c.shape[1]
+    if nn == 0:
+        return dd
+    
+    dig = (c >= 48) & (c <= 57)
+    
+    # pretty print form 'DD°MM.mm′N' or 'DDD°MM.mm′E' is parsed by columns
+    done = np.zeros(nn, dtype=bool)
+    for z in [2, 3]:
+        if ll < z + 8:
+            continue
+        std = np.all(dig[:,:z], axis=1) & (c[:,z] == ord(arc_deg)) & dig[:,z+1] & dig[:,z+2]
+        std = std & (c[:,z+3] == ord('.')) & dig[:,z+4] & dig[:,z+5] & (c[:,z+6] == ord(arc_min))
+        std = std & np.isin(c[:,z+7], [ord('N'), ord('S'), ord('E'), ord('W')])
+        if ll > z + 8:
+            std = std & (c[:,z+8] == 0)
         
-    return dms2dd([d,m])
+        cs = c[std].astype(np.int64) - 48
+        d = np.zeros(len(cs))
+        for j in range(z):
+            d = 10*d + cs[:,j]
+        m = (1000*cs[:,z+1] + 100*cs[:,z+2] + 10*cs[:,z+4] + cs[:,z+5]) / 100.0
+        o = cs[:,z+7] + 48
+        sgn = np.where((o == ord('S')) | (o == ord('W')), -1.0, 1.0)
+        top = np.where((o == ord('N')) | (o == ord('S')), 90.0, 180.0)
+        dd[std] = np.where((m <= 60.0) & (d + m/60.0 <= top), sgn*(d + m/60.0), np.nan)
+        done = done | std
+    
+    other = ~done
+    if not(np.any(other)):
+        return dd
+    
+    c = c[other]
+    dig = dig[other]
+    nn = len(c)
+    
+    num = dig | (c == ord('.'))
+    start = num & ~np.concatenate((np.zeros((nn,1), dtype=bool), num[:,:-1]), axis=1)
+    tok = np.cumsum(start, axis=1) * num # number index of characters, 0 - no number
+    
+    ntok = np.max(tok, axis=1)
+    
+    # strings which are not angle forms are not parsed: unknown characters
+    # (exponents, ...), more than three numbers or one orientation letter,
+    # signs after numbers, numbers without digits or with more dots and
+    # decimal degrees or minutes followed by minutes or seconds
+    known = dig | np.isin(c, dm_codes) | (c == 0)
+    ori = np.isin(c, [ord('N'), ord('S'), ord('E'), ord('W')])
+    sign = np.isin(c, [ord('-'), ord('+'), ord(long_minus)])
+    bad = np.any(~known, axis=1) | (ntok > 3) | (np.sum(ori, axis=1) > 1)
+    bad = bad | np.any(sign & (np.cumsum(num, axis=1) > 0), axis=1)
+    
+    # numbers are integer mantissas divided by powers of 10 (exact as float())
+    val = np.zeros((nn, 3))
+    intd = np.zeros(nn, dtype=int) # integer digits of the first number
+    for k in range(3):
+        tk = (tok == k + 1)
+        dk = tk & dig
+        dots = np.sum(tk & (c == ord('.')), axis=1)
+        bad = bad | (np.any(tk, axis=1) & ~np.any(dk, axis=1)) | (dots > 1) | ((dots > 0) & (ntok > k + 1))
+        frac = dk & (np.cumsum(tk & (c == ord('.')), axis=1) > 0)
+        right = np.cumsum(dk[:,::-1], axis=1)[:,::-1] - dk # digits right of character
+        mant = np.sum(np.where(dk, (c.astype(float) - 48)*10.0**right, 0.0), axis=1)
+        val[:,k] = mant / 10.0**np.sum(frac, axis=1)
+        if k == 0:
+            intd = np.sum(dk & ~frac, axis=1)
+    
+    # single number with 4 or more integer digits is NMEA ddmm.mm or dddmm.mm
+    nmea = (ntok == 1) & (intd >= 4)
+    deg = np.floor(val[:,0]/100.0)
+    val[:,1] = np.where(nmea, val[:,0] - 100.0*deg, val[:,1])
+    val[:,0] = np.where(nmea, deg, val[:,0])
+    
+    # orientation is the N/S/E/W letter, otherwise leading minus
+    last = np.where(np.any(ori, axis=1), ll - 1 - np.argmax(ori[:,::-1], axis=1), -1)
+    o = np.where(last >= 0, c[np.arange(nn), np.maximum(last, 0)], 0)
+    minus = np.isin(c, [ord('-'), ord(long_minus)]) & (np.cumsum(num, axis=1) == 0)
+    neg = np.where(last >= 0, (o == ord('S')) | (o == ord('W')), np.any(minus, axis=1))
+    
+    # 60 minutes or seconds are carried (see prettyPrintDM)
+    ok = (ntok > 0) & ~bad & (val[:,1] <= 60.0) & (val[:,2] <= 60.0)
+    val = np.where(neg, -1.0, 1.0)*(val[:,0] + val[:,1]/60.0 + val[:,2]/3600.0)
+    
+    # angle range is given by orientation
+    ok = ok & ~(np.isin(o, [ord('N'), ord('S')]) & (np.fabs(val) > 90.0))
+    ok = ok & ~(np.isin(o, [ord('E'), ord('W')]) & (np.fabs(val) > 180.0))
+    dd[other] = np.where(ok, val, np.nan)
+    
+    return dd
+
+
+# Checks if all arguments are scalars (not arrays or lists)
+def isScalar(*args):
+    
+    for a in args:
+        if np.ndim(a) != 0:
+            return False
+    
+    return True
 
 
 # Converts decimal degrees in radians
+# deg2rad and rad2deg work also with numpy arrays
 def deg2rad(dd):
     
     return dd/180.0*mat.pi
@@ -206,6 +562,15 @@ def position2array(pts):
         print('Input size mismatch: len(pts)={:d}'.format(len(pts)))
         raise AssertionError()
         
+    # regular input is converted at once, positions can have height
+    try:
+        pa = np.asarray(pts, dtype=float)
+    except ValueError:
+        pa = None
+    
+    if pa is not None and pa.ndim == 2 and pa.shape[1] >= 2:
+        return np.array(pa[:,:2], dtype=float)
+    
     pa = np.zeros((nn,2))
     for i in range(nn):
         pa[i,0] = pts[i][0]
@@ -216,8 +581,12 @@ def position2array(pts):
 
 # Calculates delta LONG in a correct way
 # All calculations are oriented eastward 0...360, opposite as the hour angle!
+# Longitudes can be numpy arrays (broadcasting), see deltaLongArray
 def deltaLong(la_0, la_1):
 
+    if not(isScalar(la_0, la_1)):
+        return deltaLongArray(la_0, la_1)
+
     if la_0 < 0:
         la0 = 360 + la_0
     else:
@@ -234,13 +603,34 @@ def deltaLong(la_0, la_1):
         dl = 360 + dl
     elif dl > 180:
         dl = dl - 360
-        
+
+    return dl
+
+
+# Calculates delta LONG for arrays of longitudes (numpy broadcasting)
+# Same orientation and limits as deltaLong
+def deltaLongArray(la_0, la_1):
+
+    la0 = np.asarray(la_0, dtype=float)
+    la1 = np.asarray(la_1, dtype=float)
+
+    la0 = np.where(la0 < 0, 360 + la0, la0)
+    la1 = np.where(la1 < 0, 360 + la1, la1)
+
+    dl = la1 - la0
+    dl = np.where(dl < -180, 360 + dl, np.where(dl > 180, dl - 360, dl))
+
     return dl
 
 
 # Converts nautical angle to math angle
+# c can be a numpy array
 def mathAngle(c):
     
+    if not(isScalar(c)):
+        c = np.asarray(c, dtype=float)
+        return np.where((c > 0) & (c <= 3*mat.pi/2), mat.pi/2 - c, 2*mat.pi - c + mat.pi/2)
+    
     if c > 0 and c <= mat.pi/2:
         w = mat.pi/2 - c
     elif c > mat.pi/2 and c <= 3*mat.pi/2:
@@ -252,8 +642,12 @@ def mathAngle(c):
 
 
 # Finds navigational angle from mathematical angle
+# Arguments can be numpy arrays (broadcasting), see navAngleArray
 def navAngle(w, df, dl):
     
+    if not(isScalar(w, df, dl)):
+        return navAngleArray(w, df, dl)
+    
     if mat.fabs(df) < 1e-8: # df = 0
         if dl > 0:
             c = mat.pi/2;
@@ -272,10 +666,31 @@ def navAngle(w, df, dl):
         c = mat.pi + w
     else: # IV quadrant
         c = 2*mat.pi - w
-    
+
     return c
 
 
+# Finds navigational angles from mathematical angles for arrays
+# Same cases as navAngle, evaluated with masks
+def navAngleArray(w, df, dl):
+
+    [w, df, dl] = np.broadcast_arrays(np.asarray(w, dtype=float), np.asarray(df, dtype=float), np.asarray(dl, dtype=float))
+
+    df_0 = np.fabs(df) < 1e-8
+    dl_0 = np.fabs(dl) < 1e-8
+
+    cond = [df_0 & (dl > 0), # df = 0
+            df_0,
+            dl_0 & (df > 0), # dl = 0
+            dl_0,
+            (df > 0) & (dl > 0), # I quadrant
+            (df < 0) & (dl > 0), # II quadrant
+            (df < 0) & (dl < 0)] # III quadrant
+    c = [mat.pi/2, 3*mat.pi/2, 0.0, mat.pi, w, mat.pi - w, mat.pi + w]
+
+    return np.select(cond, c, 2*mat.pi - w) # IV quadrant
+
+
 # Find integer start lambda based on delta lambda
 def getStartLambda(la0, dl, dla):
 
@@ -351,26 +766,21 @@ def getMidpoints(la_0, la_1, dla):
         if la_end < la1:
             nlp = nlp - 1
 
-    for i in range(nlp):
-        la = la_s + (i+1)*dla*dls
-        mpa.append(la)
+    # all midpoints at once, dense paths have many points
+    mpa = np.concatenate((mpa, la_s + np.arange(1, nlp+1)*dla*dls))
 
     #print('mpa:', mpa)
-    
-    new_mpa = []
-    for x in mpa:
-        if x > 180: 
-            nx = x - 360; 
-        elif x < -180: 
-            nx = 360 + x
-        else:
-            nx = x
-            
-        new_mpa.append(nx)
+
+    new_mpa = np.where(mpa > 180, mpa - 360, np.where(mpa < -180, 360 + mpa, mpa))
 
     #print('new_mpa:', new_mpa)
-    
-    return new_mpa    
+
+    # only midpoints strictly between la_0 and la_1, start lambda can be on
+    # or behind la_0 (e.g. westward from 124.9 it is 125)
+    dm = deltaLongArray(la_0, new_mpa)*dls
+    new_mpa = new_mpa[(dm > 0) & (dm < np.fabs(dl))]
+
+    return new_mpa.tolist()
 
 # Find midpoints in longitude range
 def getPathPointsLong(la_0, la_1, dla):
@@ -383,8 +793,15 @@ def getPathPointsLong(la_0, la_1, dla):
         
     
 # Calculates the route central point
+# fi = [fi_0, fi_1], la = [la_0, la_1], items can be numpy arrays
 def getRouteCentralPoint(fi, la):
     
+    if not(isScalar(fi[0], fi[1], la[0], la[1])):
+        fi_mid = (np.asarray(fi[0], dtype=float) + fi[1])/2
+        la_mid = np.asarray(la[0], dtype=float) + deltaLongArray(la[0], la[1])/2
+        la_mid = np.where(la_mid > 180, -180 + (la_mid - 180), np.where(la_mid < -180, 180 + (la_mid + 180), la_mid))
+        return [fi_mid, la_mid]
+    
     # middle latitude
     fi_mid = (fi[0] + fi[1])/2
             
@@ -5,11 +5,13 @@ Created on Sat Mar 20 09:09:02 2021
 @author: aleksander.grm@fpp.uni-lj.si
 """
 
-import math
+import numpy as np
 
 # Astronomy modules
 import skyfield.api as sfa
 
+import celestialobject as celobj
+
 
 class PlanetObject:
     def __init__(self,eph,radius,earth):
@@ -18,16 +20,7 @@ class PlanetObject:
         self.radius = radius # solar object radius
         self.earth = earth   # Earth object from ephemeris
         
-        # all astronomical data for time t
-        self.dec = 0.0    # declination [deg]
-        self.gha = 0.0    # greenwich hour angle [deg]
-        self.sha = 0.0    # siderial hour angle [deg]
-        self.gha_a = 0.0  # aries greenwich hour angle [deg]
-        self.hp = 0.0     # horizontal paralax [deg]
-        self.sd = 0.0     # aparent semi diameter angle [deg]
-        self.dist = 0.0   # distance [km]
-        self.alt = 0.0    # altitude [deg]
-        self.az = 0.0     # azimuth [deg]
+        # object holds no time dependent data, so it can be shared (threads)
 
 # **********************
 # *** Public methods ***
@@ -37,79 +30,81 @@ class PlanetObject:
     # time t must be in the skyfield timescale format
     # formaly it is UTC time - tc.utc()
     # internaly handeled in UT1
-    def get_astro_data(self,t):
-        
-        self.set_astro_data(t)
-        
-        data = {
-            'dec' : self.dec,
-            'gha' : self.gha,
-            'sha' : self.sha,
-            'gha_a' : self.gha_a,
-            'hp' : self.hp,
-            'sd' : self.sd,
-            'dist' : self.dist
-            }
+    # earth_at: precomputed Earth position at time t (optional)
+    def get_astro_data(self,t,earth_at=None):
         
-        return data
+        return self.calc_astro_data(t, earth_at)
     
     # returns altitude and azimuth for time t in dictionary object 
     # time t must be in the skyfield timescale format
     # formaly it is UTC time - tc.utc()
     # internaly handeled in UT1
-    def get_altaz(self,t,pos):
+    # observer_at: precomputed observer position at time t (optional)
+    def get_altaz(self,t,pos,observer_at=None):
         
-        self.set_altaz(t,pos)
+        return self.calc_altaz(t, pos, observer_at)
+    
+    # returns astro data, altitude and azimuth for time t in dictionary object
+    # all data are computed from one geocentric apparent position, topocentric
+    # direction is obtained by shifting it for the observer position (parallax)
+    # time t can be a scalar or a vector skyfield time object
+    # pos: position [lat, long, h] in degrees or None
+    # earth_at: precomputed Earth position at time t (optional)
+    # horizon: precomputed observer position and horizon rotation (optional)
+    def get_astro_altaz(self,t,pos,earth_at=None,horizon=None):
+        
+        if earth_at is None:
+            earth_at = self.earth.at(t)
+        
+        astrometric = earth_at.observe(self.eph).apparent()
+        ra, dec, dist = astrometric.radec(epoch='date')
+        
+        sha = np.mod(-15.0 * ra.hours, 360.0)
+        gha_a = 180. * t.gast / 12.
         
         data = {
-            'alt' : self.alt,
-            'az' : self.az,
+            'dec' : dec.degrees,
+            'gha' : np.mod(gha_a + sha, 360.0),
+            'sha' : sha,
+            'gha_a' : gha_a,
+            'hp' : np.degrees(np.arctan(6371.0 / dist.km)),
+            'sd' : np.degrees(np.arctan(self.radius / dist.km)),
+            'dist' : dist.km / 149597870.7
             }
         
+        if pos != None:
+            if horizon is None:
+                horizon = celobj.get_horizon(t, pos)
+            [alt, az] = celobj.get_horizon_altaz(astrometric.xyz.au, horizon)
+            data['alt'] = alt
+            data['az'] = az
+        
         return data
-   
+    
 # ***************************    
 # **** Private functions ****
 # ***************************
 
-    # Sets all astro data for time t
+    # Calculates all astro data for time t, object state is not changed
     # time t must be in the skyfield timescale format
     # formaly it is UTC time - tc.utc()
-    def set_astro_data(self,t):
+    def calc_astro_data(self,t,earth_at=None):
         
-        astrometric = self.earth.at(t).observe(self.eph).apparent()
-        ra, dec, dist = astrometric.radec(epoch='date')
-        
-        self.dec = dec.degrees
-        self.sha = self.gha2deg(0,ra.hours)
-        self.gha_a = 180. * t.gast / 12.
-        
-        self.gha = self.gha_a + self.sha
-        if self.gha > 360.0:
-            self.gha = self.gha - 360.0
+        return self.get_astro_altaz(t, None, earth_at)
         
-        self.dist = dist.km / 149597870.7
-        
-        self.hp = math.atan(6371.0 / dist.km) * 180/math.pi
-        self.sd = math.atan(self.radius / dist.km) * 180.0/math.pi
-        
-    # Sets planet altitude and azimuth
+    # Calculates planet altitude and azimuth
     # pos: latitude, longitude in degrees
-    def set_altaz(self,t,pos):
+    def calc_altaz(self,t,pos,observer_at=None):
         
-        location = self.earth + sfa.wgs84.latlon(pos[0], pos[1], pos[2])
-        astrometric = location.at(t).observe(self.eph).apparent()
+        if observer_at is None:
+            location = self.earth + sfa.wgs84.latlon(pos[0], pos[1], pos[2])
+            observer_at = location.at(t)
+        astrometric = observer_at.observe(self.eph).apparent()
         alt, az, d = astrometric.altaz()
         
-        self.alt = alt.degrees
-        self.az = az.degrees
-    
-    # convert GHA (hours) to degrees of arc
-    def gha2deg(self,gst, ra):
-    
-        sha = (gst - ra) * 15
-        while sha < 0:
-            sha = sha + 360
+        data = {
+            'alt' : alt.degrees,
+            'az' : az.degrees,
+            }
         
-        return sha
-
+        return data
@@ -12,12 +12,20 @@ import sys
 sys.path.append('../nav_tools')
 
 import math as mat
+import numpy as np
 import navtools as nt
+import geodesic as gd
 
 
 # Calculates distance and course out of p0 and p1
 # This is the first Loxodrome problem!
-def rhumbLineP1(p0, p1):
+# model: 'sphere' or 'wgs84' (rhumb line on the ellipsoid)
+def rhumbLineP1(p0, p1, model='sphere'):
+    
+    gd.checkModel(model)
+    if model == 'wgs84':
+        [dL, wL] = gd.rhumbInverse(p0[0], p0[1], p1[0], p1[1])
+        return [float(dL), float(wL)]
     
     fi0r = nt.deg2rad(p0[0]);
     la0d = p0[1];
@@ -31,7 +39,7 @@ def rhumbLineP1(p0, p1):
     if mat.fabs(dfr) < 1e-8: # Check if delta LAT = 0
         ft = 0
     else:
-        c_ft = dfr/mat.log(mat.tan(mat.pi/4 + fi1r/2)/mat.tan(mat.pi/4 + fi0r/2))
+        c_ft = float(getCosTildeLat(fi0r, fi1r))
         ft = mat.acos(c_ft)
         if c_ft < 0: # condition for negative angles (180 - ft)
             ft = mat.pi - ft
@@ -49,7 +57,7 @@ def rhumbLineP1(p0, p1):
     elif mat.fabs(dlr) < 1e-8:
         d = mat.fabs(dfr)
     elif (mat.fabs(w) < mat.pi/20) or (mat.fabs(w - mat.pi) < mat.pi/20): # Condition to avoid small numbers
-        d = mat.afbs(dfr)/mat.cos(w)
+        d = mat.fabs(dfr)/mat.cos(w)
     else:
         d = mat.cos(ft)*mat.fabs(dlr)/mat.sin(w)
     
@@ -61,7 +69,13 @@ def rhumbLineP1(p0, p1):
 
 # Calculates second position from first position, distance and angle
 # This is the second loxodrome problem!
-def rhumbLineP2(p0,dL,wL):
+# model: 'sphere' or 'wgs84' (rhumb line on the ellipsoid)
+def rhumbLineP2(p0,dL,wL,model='sphere'):
+
+    gd.checkModel(model)
+    if model == 'wgs84':
+        [fi1, la1] = gd.rhumbDirect(p0[0], p0[1], wL, dL)
+        return [float(fi1), float(la1)]
 
     fi0r = nt.deg2rad(p0[0])
     la0r = nt.deg2rad(p0[1])
@@ -72,7 +86,7 @@ def rhumbLineP2(p0,dL,wL):
     R = dr * mat.sin(wLr)
     
     # Find delta fi and fi1
-    if (mat.fabs(wL) < 1e-8) or (mat.fabs(wL - 180.0) < 1e-8) or (mat.fabs(wL - 360.0) < 1e-8): # case dl = 0, on parallel
+    if (mat.fabs(wL - 90.0) < 1e-8) or (mat.fabs(wL - 270.0) < 1e-8): # case df = 0, on parallel
         fi1r = fi0r;
     elif (wL > 90.0) and (wL < 270.0):
         fi1r = fi0r - dfr
@@ -82,10 +96,10 @@ def rhumbLineP2(p0,dL,wL):
     # Find delta la and la1 
     if (mat.fabs(wL) < 1e-8) or (mat.fabs(wL - 360.0) < 1e-8) or (mat.fabs(wL - 180.0) < 1e-8): # case df = 0, on meridian
         dlr = 0
-    elif (mat.fabs(wL - 90.0) < 1e-8) or (mat.fabs(wL - 270.0) < 1e-8): # Check if w = 90, 270!
+    elif (mat.fabs(wL - 90.0) < 1e-8) or (mat.fabs(wL - 270.0) < 1e-8) or (dfr == 0): # Check if w = 90, 270 or dL = 0!
         dlr = mat.fabs(R/mat.cos(fi0r))
     else:
-        cos_ft = dfr/mat.log(mat.tan(mat.pi/4 + fi1r/2)/mat.tan(mat.pi/4 + fi0r/2))
+        cos_ft = float(getCosTildeLat(fi0r, fi1r))
         dlr = mat.fabs(R/cos_ft)
     
     if (wLr < mat.pi):
@@ -99,4 +113,115 @@ def rhumbLineP2(p0,dL,wL):
     return [fi1, la1]
 
 
+# Calculates distances and courses of legs from p0 to p1
+# p0, p1: positions arrays (N,2), decimal degrees
+# returns arrays [dL, wL], same cases as rhumbLineP1 evaluated with masks
+# model: 'sphere' or 'wgs84' (rhumb line on the ellipsoid)
+def rhumbLineP1Array(p0, p1, model='sphere'):
+
+    p0 = np.asarray(p0, dtype=float).reshape(-1,2)
+    p1 = np.asarray(p1, dtype=float).reshape(-1,2)
+
+    gd.checkModel(model)
+    if model == 'wgs84':
+        return gd.rhumbInverse(p0[:,0], p0[:,1], p1[:,0], p1[:,1])
+
+    fi0r = nt.deg2rad(p0[:,0])
+    fi1r = nt.deg2rad(p1[:,0])
+
+    dfr = fi1r - fi0r # delta LAT with sign
+    dlr = nt.deg2rad(nt.deltaLongArray(p0[:,1], p1[:,1])) # delta lONG with sign
+
+    df_0 = np.fabs(dfr) < 1e-8
+    dl_0 = np.fabs(dlr) < 1e-8
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Calculation of tilde LAT (it will be always a positive number)
+        c_ft = getCosTildeLat(fi0r, fi1r)
+        ft = np.arccos(np.clip(c_ft, -1.0, 1.0))
+        ft = np.where(c_ft < 0, mat.pi - ft, ft)
+        ft = np.where(df_0, 0.0, ft)
+
+        # Depature course. Result is always in I quadrant [0,90]
+        w = np.where(df_0, mat.pi/2, np.arctan(np.cos(ft)*np.fabs(dlr/dfr)))
+
+        # Loxodrome distance
+        w_0 = (np.fabs(w) < mat.pi/20) | (np.fabs(w - mat.pi) < mat.pi/20) # avoid small numbers
+        d = np.where(df_0, np.fabs(dlr)*np.cos(fi0r),
+            np.where(dl_0, np.fabs(dfr),
+            np.where(w_0, np.fabs(dfr)/np.cos(w), np.cos(ft)*np.fabs(dlr)/np.sin(w))))
+
+    wL = nt.rad2deg(nt.navAngleArray(w,dfr,dlr)) # Convert to real course in deg!
+    dL = nt.rad2deg(d)*60 # convert to Nm!
+
+    return [dL, wL]
+
+
+# Calculates distances and courses of legs between track points
+# pts: positions array (N,2), returns arrays of N-1 legs [dL, wL]
+def rhumbLineTrack(pts, model='sphere'):
+
+    pts = np.asarray(pts, dtype=float).reshape(-1,2)
+
+    return rhumbLineP1Array(pts[:-1], pts[1:], model)
+
+
+# Calculates second positions from first positions, distances and angles
+# p0: positions array (N,2), dL: distances [Nm], wL: courses [deg]
+# returns arrays [fi1, la1], same cases as rhumbLineP2 evaluated with masks
+# model: 'sphere' or 'wgs84' (rhumb line on the ellipsoid)
+def rhumbLineP2Array(p0,dL,wL,model='sphere'):
+
+    p0 = np.asarray(p0, dtype=float).reshape(-1,2)
+    [dL, wL] = np.broadcast_arrays(np.asarray(dL, dtype=float), np.asarray(wL, dtype=float))
+
+    gd.checkModel(model)
+    if model == 'wgs84':
+        return gd.rhumbDirect(p0[:,0], p0[:,1], wL, dL)
+
+    fi0r = nt.deg2rad(p0[:,0])
+    la0r = nt.deg2rad(p0[:,1])
+    wLr = nt.deg2rad(wL)
+    dr = nt.deg2rad(dL/60) # assume dL is in Nm!
+
+    dfr = np.fabs(dr * np.cos(wLr))
+    R = dr * np.sin(wLr)
+
+    on_meridian = (np.fabs(wL) < 1e-8) | (np.fabs(wL - 180.0) < 1e-8) | (np.fabs(wL - 360.0) < 1e-8)
+    on_parallel = (np.fabs(wL - 90.0) < 1e-8) | (np.fabs(wL - 270.0) < 1e-8)
+
+    # Find delta fi and fi1
+    fi1r = np.where(on_parallel, fi0r,
+           np.where((wL > 90.0) & (wL < 270.0), fi0r - dfr, fi0r + dfr))
+
+    # Find delta la and la1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_ft = getCosTildeLat(fi0r, fi1r)
+        dlr = np.where(on_meridian, 0.0,
+              np.where(on_parallel | (dfr == 0), np.fabs(R/np.cos(fi0r)), np.fabs(R/cos_ft)))
+
+    la1r = np.where(wLr < mat.pi, la0r + dlr, la0r - dlr)
+
+    fi1 = nt.rad2deg(fi1r)
+    la1 = nt.rad2deg(la1r)
+
+    return [fi1, la1]
+
+
+# Calculates cos of tilde LAT, ratio of delta LAT and delta of meridional
+# parts, for latitudes fi0r, fi1r in radians (numpy arrays)
+# for small delta LAT the ratio of differences loses precision, the series
+# at the middle latitude is used: cos(fm)/(1 + dfr^2*(tan(fm)^2 + 1/cos(fm)^2)/24)
+def getCosTildeLat(fi0r, fi1r):
+
+    fi0r = np.asarray(fi0r, dtype=float)
+    fi1r = np.asarray(fi1r, dtype=float)
+
+    dfr = fi1r - fi0r
+    fmr = (fi0r + fi1r)/2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        c_ft = dfr/np.log(np.tan(mat.pi/4 + fi1r/2)/np.tan(mat.pi/4 + fi0r/2))
+        c_fm = np.cos(fmr)/(1 + dfr**2*(np.tan(fmr)**2 + 1/np.cos(fmr)**2)/24)
 
+    return np.where(np.fabs(dfr) < 1e-4, c_fm, c_ft)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 17:02:44 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Route of rhumb line legs between waypoints!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import numpy as np
+import navtools as nt
+import rhumbline as rl
+
+
+class Route:
+    def __init__(self,pts,model='sphere'):
+
+        self.model = model                  # earth model: 'sphere' or 'wgs84'
+        self.pts = nt.position2array(pts)   # waypoints (N,2) [lat, long]
+
+        self.leg_d = None # leg distances (N-1) [Nm]
+        self.leg_c = None # leg courses (N-1) [deg]
+        self.cum_d = None # distance from the first waypoint (N) [Nm]
+
+        self.build()
+
+# **********************
+# *** Public methods ***
+# **********************
+
+    # Calculates all legs and cumulative distances
+    def build(self):
+
+        [self.leg_d, self.leg_c] = rl.rhumbLineTrack(self.pts, self.model)
+        self.cum_d = np.concatenate(([0.0], np.cumsum(self.leg_d)))
+
+        return self
+
+    # returns number of waypoints
+    def get_size(self):
+
+        return len(self.pts)
+
+    # returns total route distance in Nm
+    def get_distance(self):
+
+        return self.cum_d[-1]
+
+    # returns distance remaining from waypoint(s) i to the last waypoint in Nm
+    def get_distance_remaining(self, i):
+
+        return self.cum_d[-1] - self.cum_d[i]
+
+    # returns leg index(es) for distance(s) s from the first waypoint,
+    # leg i is between waypoints i and i+1
+    def get_leg_index(self, s):
+
+        i = np.searchsorted(self.cum_d, s, side='right') - 1
+
+        return np.clip(i, 0, len(self.leg_d) - 1)
+
+    # returns position(s) at distance(s) s from the first waypoint in Nm
+    # s is limited to the route, returns [lat, long] or array (M,2)
+    def get_position_at(self, s):
+
+        s = np.clip(np.asarray(s, dtype=float), 0.0, self.cum_d[-1])
+        i = self.get_leg_index(s)
+
+        [fi, la] = rl.rhumbLineP2Array(self.pts[i].reshape(-1,2), s - self.cum_d[i], self.leg_c[i], self.model)
+        la = np.where(la > 180, la - 360, np.where(la < -180, la + 360, la))
+
+        pos = np.transpose(np.array([fi, la]))
+        if np.ndim(s) == 0:
+            return pos[0].tolist()
+
+        return pos
+
+    # Replaces waypoint i with position p, only the legs to and from the
+    # waypoint are recalculated
+    def set_waypoint(self, i, p):
+
+        nn = len(self.pts)
+        if i < 0:
+            i = nn + i
+
+        self.pts[i,0] = p[0]
+        self.pts[i,1] = p[1]
+
+        j0 = max(i - 1, 0)
+        j1 = min(i, nn - 2)
+        [dd, cc] = rl.rhumbLineP1Array(self.pts[j0:j1+1], self.pts[j0+1:j1+2], self.model)
+
+        for k in range(j1 - j0 + 1):
+            j = j0 + k
+            self.cum_d[j+1:] += dd[k] - self.leg_d[j]
+            self.leg_d[j] = dd[k]
+            self.leg_c[j] = cc[k]
+
+        return self
+
+    # returns waypoints array (N,2)
+    def get_waypoints(self):
+
+        return self.pts
+
+    # returns legs data [distances, courses, cumulative distances]
+    def get_legs(self):
+
+        return [self.leg_d, self.leg_c, self.cum_d]
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 17:48:15 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Spatial index of route legs for nearest point on route queries!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import math as mat
+import numpy as np
+from scipy.spatial import cKDTree
+
+import rhumbline as rl
+
+
+class RouteIndex:
+    def __init__(self,route,spacing=None,k=8):
+
+        self.route = route # Route object, rebuild index after waypoint edits
+        self.k = k         # number of nearest samples per query
+
+        # legs are rhumb lines of the route
+        [self.leg_d, self.leg_c, self.cum_d] = route.get_legs()
+        self.leg_a = np.radians(self.leg_d/60.0) # leg lengths [rad]
+
+        # sample spacing [rad], legs longer than spacing are sampled inside
+        if spacing == None:
+            self.h = max(np.median(self.leg_a), 1e-9)
+        else:
+            self.h = mat.radians(spacing/60.0)
+
+        self.build_tree()
+
+# **********************
+# *** Public methods ***
+# **********************
+
+    # Finds the nearest route leg for position(s) pos [lat, long] or array (M,2)
+    # returns dictionary of values (arrays for array input):
+    #   'leg'       - nearest leg index, leg i is between waypoints i and i+1
+    #   'dist'      - distance to the route [Nm]
+    #   'xte'       - cross track distance [Nm], positive right of the track
+    #   'along'     - along track distance from the first waypoint [Nm]
+    #   'remaining' - distance to the last waypoint [Nm]
+    #   'next'      - index of the next waypoint
+    def query(self, pos):
+
+        p = np.asarray(pos, dtype=float)
+        single = (p.ndim == 1)
+        p = p.reshape(-1,2)
+
+        xp = self.get_unit_vectors(p)
+
+        nq = len(p)
+        leg = np.zeros(nq, dtype=int)
+        dist = np.zeros(nq)
+        xte = np.zeros(nq)
+        s = np.zeros(nq)
+        for [rows, legs] in self.get_candidate_legs(xp):
+            [d, x, f] = self.get_leg_distances(xp[rows], legs)
+            j = np.argmin(d, axis=1)
+            m = np.arange(len(rows))
+            leg[rows] = legs[m,j]
+            dist[rows] = d[m,j]
+            xte[rows] = x[m,j]
+            s[rows] = f[m,j]
+
+        along = self.cum_d[leg] + s
+
+        data = {
+            'leg' : leg,
+            'dist' : np.degrees(dist)*60,
+            'xte' : np.degrees(xte)*60,
+            'along' : along,
+            'remaining' : self.cum_d[-1] - along,
+            'next' : np.where(s < self.leg_d[leg], leg + 1, np.minimum(leg + 2, len(self.cum_d) - 1)),
+            }
+
+        if single:
+            for key in data.keys():
+                data[key] = data[key][0]
+
+        return data
+
+
+# ***************************
+# **** Private functions ****
+# ***************************
+
+    # Converts positions array (N,2) to unit vectors (N,3)
+    def get_unit_vectors(self, p):
+
+        fi = np.radians(p[:,0])
+        la = np.radians(p[:,1])
+
+        return np.column_stack((np.cos(fi)*np.cos(la), np.cos(fi)*np.sin(la), np.sin(fi)))
+
+    # returns positions (N,2) on legs at distances s [Nm] from the leg start
+    def get_leg_positions(self, legs, s):
+
+        pts = self.route.get_waypoints()
+        [fi, la] = rl.rhumbLineP2Array(pts[legs], s, self.leg_c[legs], self.route.model)
+
+        return np.column_stack((fi, la))
+
+    # Builds k-d tree of waypoints and samples inside long legs
+    def build_tree(self):
+
+        pts = self.route.get_waypoints()
+        nl = len(self.leg_a)
+        ns = np.maximum(np.ceil(self.leg_a/self.h).astype(int), 1) # samples per leg
+
+        # waypoint i is sample of leg i (last one of the last leg)
+        leg = [np.minimum(np.arange(nl + 1), nl - 1)]
+        xyz = [self.get_unit_vectors(pts)]
+        wpt = [np.ones(nl + 1, dtype=bool)]
+
+        # interior samples along rhumb line legs
+        li = np.repeat(np.arange(nl), ns - 1)
+        if len(li) > 0:
+            start = np.repeat(np.cumsum(ns - 1) - (ns - 1), ns - 1)
+            t = (np.arange(len(li)) - start + 1)/ns[li]
+            leg.append(li)
+            xyz.append(self.get_unit_vectors(self.get_leg_positions(li, t*self.leg_d[li])))
+            wpt.append(np.zeros(len(li), dtype=bool))
+
+        self.sample_leg = np.concatenate(leg)
+        self.sample_wpt = np.concatenate(wpt)
+        self.tree = cKDTree(np.concatenate(xyz))
+
+    # Yields candidate legs [rows, legs (R,C)] for unit vectors xp (M,3); every
+    # leg containing a point closer than the nearest sample is a candidate,
+    # positions with more samples in range are queried again with larger k
+    def get_candidate_legs(self, xp):
+
+        rows = np.arange(len(xp))
+        k = self.k
+        while len(rows) > 0:
+            k = min(k, self.tree.n)
+            [d, idx] = self.tree.query(xp[rows], k=k)
+            d = d.reshape(len(rows), -1)
+            idx = idx.reshape(len(rows), -1)
+
+            # nearest point on the nearest leg is within h/2 of its sample
+            a0 = 2*np.arcsin(np.minimum(d[:,0]/2, 1.0))
+            r = 2*np.sin(np.minimum(a0 + self.h/2, mat.pi)/2)
+            done = (d[:,-1] > r) | (k == self.tree.n)
+
+            legs = self.sample_leg[idx[done]]
+            prev = np.where(self.sample_wpt[idx[done]], np.maximum(legs - 1, 0), legs)
+            yield [rows[done], np.concatenate((legs, prev), axis=1)]
+
+            rows = rows[~done]
+            k = 4*k
+
+    # Calculates distances from unit vectors xp (R,3) to rhumb line legs (R,C)
+    # returns [distance, cross track distance in radians, along leg distance in Nm]
+    def get_leg_distances(self, xp, legs):
+
+        shape = legs.shape
+        legs = legs.ravel()
+        xp = np.repeat(xp, shape[1], axis=0)
+        la = self.leg_a[legs]
+        ld = self.leg_d[legs]
+        cr = np.radians(self.leg_c[legs])
+
+        # foot point on the rhumb line, the great circle tangent to the leg
+        # at the current point gives the along track step (Newton iterations)
+        s = np.clip(self.get_mercator_fraction(xp, legs), 0.0, 1.0)*ld
+        act = np.arange(len(s))
+        for it in range(30):
+            q = self.get_leg_positions(legs[act], s[act])
+            [xq, u] = self.get_tangents(q, cr[act])
+            at = np.arctan2(np.sum(xp[act]*u, axis=1), np.sum(xp[act]*xq, axis=1))
+            s1 = np.clip(s[act] + np.degrees(at)*60, 0.0, ld[act])
+            moving = np.fabs(s1 - s[act]) > 1e-7
+            s[act] = s1
+            act = act[moving]
+            if len(act) == 0:
+                break
+
+        # cross track angle, positive right of the track
+        q = self.get_leg_positions(legs, s)
+        [xq, u] = self.get_tangents(q, cr)
+        xte = -np.arcsin(np.clip(np.sum(xp*np.cross(xq, u), axis=1), -1.0, 1.0))
+
+        da = self.get_arc(xp, self.get_unit_vectors(self.route.get_waypoints()[legs]))
+        db = self.get_arc(xp, self.get_unit_vectors(self.route.get_waypoints()[legs + 1]))
+        inside = (s > 0) & (s < ld) & (la > 0)
+        dist = np.where(inside, self.get_arc(xp, xq), np.minimum(da, db))
+        s = np.where(inside, s, np.where(da <= db, 0.0, ld))
+
+        return [dist.reshape(shape), xte.reshape(shape), s.reshape(shape)]
+
+    # returns fractions of legs of positions xp projected on the legs in the
+    # Mercator projection (rhumb lines are straight lines)
+    def get_mercator_fraction(self, xp, legs):
+
+        pts = np.radians(self.route.get_waypoints())
+        a = pts[legs]
+        b = pts[legs + 1]
+        p = np.column_stack((np.arcsin(np.clip(xp[:,2], -1.0, 1.0)), np.arctan2(xp[:,1], xp[:,0])))
+
+        bx = np.mod(b[:,1] - a[:,1] + mat.pi, 2*mat.pi) - mat.pi
+        by = self.get_mercator_y(b[:,0]) - self.get_mercator_y(a[:,0])
+        px = np.mod(p[:,1] - a[:,1] + mat.pi, 2*mat.pi) - mat.pi
+        py = self.get_mercator_y(p[:,0]) - self.get_mercator_y(a[:,0])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (px*bx + py*by)/(bx**2 + by**2)
+
+        return np.where(np.isfinite(t), t, 0.0)
+
+    # returns Mercator ordinates of latitudes fi [rad] on the unit sphere
+    def get_mercator_y(self, fi):
+
+        return np.log(np.tan(mat.pi/4 + np.clip(fi, -1.5, 1.5)/2))
+
+    # returns [unit vectors (N,3), unit course vectors (N,3)] of positions
+    # q (N,2) and courses cr [rad]
+    def get_tangents(self, q, cr):
+
+        fi = np.radians(q[:,0])
+        la = np.radians(q[:,1])
+
+        xq = np.column_stack((np.cos(fi)*np.cos(la), np.cos(fi)*np.sin(la), np.sin(fi)))
+        north = np.column_stack((-np.sin(fi)*np.cos(la), -np.sin(fi)*np.sin(la), np.cos(fi)))
+        east = np.column_stack((-np.sin(la), np.cos(la), np.zeros(len(la))))
+
+        return [xq, np.cos(cr)[:,None]*north + np.sin(cr)[:,None]*east]
+
+    # returns arcs [rad] between unit vectors
+    def get_arc(self, x0, x1):
+
+        return np.arctan2(np.linalg.norm(np.cross(x0, x1), axis=-1), np.sum(x0*x1, axis=-1))
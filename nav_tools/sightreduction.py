@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 14:05:18 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Batch sight reduction with a pool of worker processes!
+"""
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import celestialdata as cdata
+
+# Columns of sight requests table
+sight_keys = ['vessel', 'date', 'time', 'pos', 'body', 'hs']
+
+# Columns of sight reduction results
+result_keys = ['hc', 'zn', 'lha', 'gha', 'dec']
+
+# CelestialData object of the worker process
+worker_cd = None
+
+
+# Sight reduction of a sights table
+# path: data path of astronomical databases
+# sights: table of sight requests, dictionary of columns (lists) or pandas
+#         dataframe with columns:
+#   'vessel' - vessel ID
+#   'date'   - date in list format [yyyy,mm,dd]
+#   'time'   - time in list format [HH,MM,SS] (UTC)
+#   'pos'    - assumed position in decimal degrees [+-lat, +-long, h]
+#   'body'   - celestial object name (star or solar object)
+#   'hs'     - sextant altitude [deg]
+# workers: number of worker processes (None - number of CPUs, 1 - no pool)
+# batch_size: number of sights reduced in one batch
+# kwargs: CelestialData options (offline, iers_policy, ...), see CelestialData
+# returns [results, report]:
+#   results - dictionary of columns in input order: vessel, body, hs and
+#             numpy arrays of hc, zn, lha, gha, dec [deg]
+#   report  - batches throughput [[batch, sights, time, sights/s], ...]
+def reduce_sights(path, sights, workers=None, batch_size=1000, **kwargs):
+
+    for k in sight_keys:
+        if not(k in sights):
+            print('  ERROR: Sights table has no column: {:s}'.format(k))
+            raise AssertionError()
+
+    table = {}
+    for k in sight_keys:
+        table[k] = list(sights[k])
+
+    nn = len(table['body'])
+    batches = []
+    for i in range(0, nn, batch_size):
+        batch = {}
+        for k in sight_keys:
+            batch[k] = table[k][i:i+batch_size]
+        batches.append(batch)
+
+    if workers == None:
+        workers = os.cpu_count()
+
+    if workers == 1:
+        init_worker(path, kwargs)
+        out = [reduce_batch(b) for b in batches]
+    else:
+        # loaded data are shared with forked worker processes
+        cdata.CelestialData.shared(path, preload=True, **kwargs)
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(path, kwargs)) as ex:
+            out = list(ex.map(reduce_batch, batches))
+
+    results = {
+        'vessel' : table['vessel'],
+        'body' : table['body'],
+        'hs' : np.array(table['hs'], dtype=float),
+        }
+    for k in result_keys:
+        if len(out) > 0:
+            results[k] = np.concatenate([o[0][k] for o in out])
+        else:
+            results[k] = np.zeros(0)
+
+    report = []
+    for i in range(len(out)):
+        ns = len(batches[i]['body'])
+        dt = out[i][1]
+        report.append([i, ns, dt, ns/dt])
+
+    return [results, report]
+
+
+# Prints batches throughput report
+def print_report(report):
+
+    ns = 0
+    for r in report:
+        print('  batch {:4d}: {:6d} sights in {:8.3f} s ({:10.1f} sights/s)'.format(r[0], r[1], r[2], r[3]))
+        ns += r[1]
+
+    print('  total: {:d} sights in {:d} batches'.format(ns, len(report)))
+
+
+# ***************************
+# **** Private functions ****
+# ***************************
+
+# Worker process initializer, uses shared CelestialData object
+# kwargs: CelestialData constructor options
+def init_worker(path, kwargs):
+
+    global worker_cd
+    worker_cd = cdata.CelestialData.shared(path, preload=True, **kwargs)
+
+
+# Reduces one batch of sights in the worker process, sights of the same
+# celestial object are reduced in one vectorized computation for all their
+# times and positions
+# returns [results, batch time]
+def reduce_batch(batch):
+
+    t0 = time.perf_counter()
+
+    nn = len(batch['body'])
+    res = {}
+    for k in result_keys:
+        res[k] = np.zeros(nn)
+
+    groups = {}
+    for i in range(nn):
+        groups.setdefault(batch['body'][i], []).append(i)
+
+    for name in groups.keys():
+        idx = groups[name]
+        times = [worker_cd.filter_list_of_int(batch['date'][i]) + worker_cd.filter_list_of_int(batch['time'][i]) for i in idx]
+        pos = [batch['pos'][i] for i in idx]
+
+        data = worker_cd.get_celestial_data_series(name, times, pos)
+        res['hc'][idx] = data['hc']
+        res['zn'][idx] = data['wc']
+        res['lha'][idx] = data['lha']
+        res['gha'][idx] = data['gha']
+        res['dec'][idx] = data['dec']
+
+    return [res, time.perf_counter() - t0]
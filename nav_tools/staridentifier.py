@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 19:02:51 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Identification of celestial objects from measured altitude and azimuth!
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+class StarIdentifier:
+    def __init__(self,cd,t,planets=True):
+
+        self.cd = cd                           # CelestialData object
+        self.t = cd.filter_list_of_int(t)      # epoch [yyyy,mm,dd,HH,MM,SS]
+
+        # declination and SHA of navigational stars (and solar objects) for
+        # the epoch, planets move fast, so epoch should be near observations
+        sd = cd.get_all_stars_data(self.t[0:3], self.t[3:6], None)
+        names = list(sd['cbody'])
+        dec = list(sd['dec'])
+        sha = list(sd['sha'])
+
+        if planets:
+            for name in cd.solar:
+                data = cd.get_celestial_data(name, self.t[0:3], self.t[3:6], None)
+                names.append(name)
+                dec.append(data['dec'])
+                sha.append(data['sha'])
+
+        cb_db = cd.get_all_celestial_objects_db()
+
+        self.cbody = np.array(names)                    # object IDs
+        self.name = np.array([cb_db[k] for k in names]) # object names
+        self.dec = np.array(dec)                        # declinations [deg]
+        self.sha = np.array(sha)                        # SHA [deg]
+
+        self.tree = cKDTree(self.get_unit_vectors(self.dec, self.sha))
+
+# **********************
+# *** Public methods ***
+# **********************
+
+    # Identifies celestial objects from measured altitudes and azimuths
+    # t: time in list format [yyyy,mm,dd,HH,MM,SS] or list of times
+    # pos: assumed position in decimal degrees [+-lat, +-long] or list of positions
+    # hs: measured (sextant) altitudes [deg]
+    # zn: measured azimuths [deg]
+    # k: number of ranked candidates
+    # sigma: expected error of measured declination and SHA [deg]
+    # returns dictionary of arrays:
+    #   'dec', 'sha'   - measured declination and SHA (N)
+    #   'cbody', 'name' - candidate IDs and names (N,k), nearest first
+    #   'dist'         - angular distance of candidates [deg] (N,k)
+    #   'confidence'   - candidate probability (N,k), low when no candidate is
+    #                    within a few sigma
+    def identify(self, t, pos, hs, zn, k=3, sigma=1.0):
+
+        hs = np.atleast_1d(np.asarray(hs, dtype=float))
+        zn = np.atleast_1d(np.asarray(zn, dtype=float))
+        pp = np.asarray(pos, dtype=float).reshape(-1, np.shape(pos)[-1])
+
+        if np.ndim(t) == 1:
+            gha_a = self.cd.get_aries_gha(self.cd.filter_list_of_int(t))
+        else:
+            gha_a = 180.0 * self.cd.get_time_series(t).gast / 12.0
+
+        [dec, sha] = self.get_dec_sha(pp[:,0], pp[:,1], hs, zn, gha_a)
+
+        k = min(k, len(self.cbody))
+        [d, idx] = self.tree.query(self.get_unit_vectors(dec, sha), k=k)
+        d = d.reshape(len(dec), k)
+        idx = idx.reshape(len(dec), k)
+
+        dist = np.degrees(2.0*np.arcsin(np.minimum(d/2.0, 1.0)))
+
+        # gaussian likelihood of candidates against 3 sigma outlier level
+        w = np.exp(-0.5*(dist/sigma)**2)
+        conf = w / (np.sum(w, axis=1)[:,None] + np.exp(-4.5))
+
+        data = {
+            'dec' : dec,
+            'sha' : sha,
+            'cbody' : self.cbody[idx],
+            'name' : self.name[idx],
+            'dist' : dist,
+            'confidence' : conf,
+            }
+
+        return data
+
+
+# ***************************
+# **** Private functions ****
+# ***************************
+
+    # returns unit vectors (N,3) on celestial sphere for declinations and SHA
+    def get_unit_vectors(self, dec, sha):
+
+        dec = np.radians(dec)
+        sha = np.radians(sha)
+
+        return np.column_stack((np.cos(dec)*np.cos(sha), np.cos(dec)*np.sin(sha), np.sin(dec)))
+
+    # Calculates declination and SHA from altitude and azimuth
+    # returns [dec, sha] in degrees
+    def get_dec_sha(self, fi, la, hs, zn, gha_a):
+
+        fi = np.radians(fi)
+        h = np.radians(hs)
+        z = np.radians(zn)
+
+        sd = np.sin(fi)*np.sin(h) + np.cos(fi)*np.cos(h)*np.cos(z)
+        dec = np.degrees(np.arcsin(np.clip(sd, -1.0, 1.0)))
+
+        # local hour angle, measured westward
+        lha = np.degrees(np.arctan2(-np.sin(z)*np.cos(h), np.cos(fi)*np.sin(h) - np.sin(fi)*np.cos(h)*np.cos(z)))
+        sha = np.mod(lha - la - gha_a, 360.0)
+
+        return [dec, sha]
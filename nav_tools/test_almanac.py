@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:02:19 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Tests of nautical almanac tables!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import os
+import pytest
+import numpy as np
+
+import celestialdata as cdata
+import almanac as alm
+
+# data path of astronomical databases, see test_celestialdata.py
+data_path = os.environ.get('NAV_DATA_PATH', os.path.dirname(os.path.abspath(__file__)))
+
+
+# returns almanac tables of three days, test is skipped without data
+def get_almanac():
+
+    if not(os.path.exists(data_path + '/de421.bsp')):
+        pytest.skip('no astronomical databases in {:s} (set NAV_DATA_PATH)'.format(data_path))
+
+    cd = cdata.CelestialData.shared(data_path, offline=True, iers_policy='extrapolate')
+
+    return alm.NauticalAlmanac(cd).build([2024, 5, 2], [2024, 5, 4])
+
+
+# Interpolation error against direct computation is within the documented
+# limits in minutes of arc
+def test_interpolation_error():
+
+    na = get_almanac()
+    cd = na.cd
+    jd = na.jd0 + np.random.default_rng(1).uniform(0, 3, 200)
+    utc = cd.ts.ut1_jd(jd)
+
+    for name in na.names:
+        d = cd.get_celestial_data_series(name, utc)
+        for order in [1, 3]:
+            a = na.get_data_jd(name, jd, order)
+            for k in alm.almanac_keys:
+                err = 60.0*np.max(np.fabs(np.mod(a[k] - d[k] + 180.0, 360.0) - 180.0))
+                if order == 3 or k in ['hp', 'sd']:
+                    assert err < 0.001
+                elif name == 'moon':
+                    assert err < 0.05
+                else:
+                    assert err < 0.001
+
+        err = 60.0*np.max(np.fabs(np.mod(na.get_data_jd('aries', jd)['gha'] - d['gha_a'] + 180.0, 360.0) - 180.0))
+        assert err < 0.001
+
+
+# Tables are saved and loaded, times in list format agree with julian dates
+def test_save_load(tmp_path):
+
+    na = get_almanac()
+    file_name = str(tmp_path) + '/almanac.npz'
+    na.save(file_name)
+    na1 = alm.NauticalAlmanac(file_name=file_name)
+
+    assert na1.names == na.names
+    t = [2024, 5, 3, 17, 42, 30]
+    jd = na.julian_date(t)
+    assert np.fabs(jd - na.cd.ts.ut1(*t).ut1) < 1e-9
+    for name in na.names + ['aries']:
+        d = na1.get_data(name, t, 3)
+        d0 = na.get_data_jd(name, jd, 3)
+        for k in d.keys():
+            assert d[k] == d0[k]
+
+    with pytest.raises(AssertionError):
+        na1.get_data('sun', [2024, 5, 5, 1, 0, 0])
+    with pytest.raises(AssertionError):
+        na1.get_data('vega', t)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:08:36 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Tests of least-squares astro fix!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import numpy as np
+
+import astrofix as af
+
+
+# returns [true positions, assumed positions, gha, dec, exact altitudes, azimuths]
+def get_fixes(ff, bb, seed):
+
+    rng = np.random.default_rng(seed)
+    pos = np.column_stack((rng.uniform(-60, 60, ff), rng.uniform(-180, 180, ff)))
+    ap = pos + rng.normal(0, 0.3, (ff, 2))
+
+    dec = rng.uniform(-20, 20, (ff, bb))
+    gha = np.mod(rng.uniform(-60, 60, (ff, bb)) - pos[:,1][:,None], 360.0)
+    [ho, zn] = af.get_altaz(pos, gha, dec)
+
+    return [pos, ap, gha, dec, ho, zn]
+
+
+# Exact altitudes give the true position with iterated fix
+def test_exact_fix():
+
+    [pos, ap, gha, dec, ho, zn] = get_fixes(100, 4, 1)
+
+    r = af.solve_fix(ap, ho, gha=gha, dec=dec)
+
+    assert np.max(np.fabs(r['pos'] - pos)) < 1e-8
+    assert np.nanmax(np.fabs(r['residuals'])) < 1e-6
+
+
+# nan in inputs of a masked observation does not poison the fix
+def test_nan_inputs():
+
+    [pos, ap, gha, dec, ho, zn] = get_fixes(100, 4, 2)
+    r0 = af.solve_fix(ap, ho[:,:3], gha=gha[:,:3], dec=dec[:,:3])
+
+    for k in ['ho', 'gha', 'dec']:
+        data = {'ho' : ho.copy(), 'gha' : gha.copy(), 'dec' : dec.copy()}
+        data[k][:,3] = np.nan
+        r = af.solve_fix(ap, data['ho'], gha=data['gha'], dec=data['dec'])
+
+        assert not(np.any(np.isnan(r['pos'])))
+        assert np.max(np.fabs(r['pos'] - r0['pos'])) < 1e-10
+        assert np.all(np.isnan(r['residuals'][:,3]))
+
+    # fix from calculated altitudes and azimuths, one step
+    [hc, zc] = af.get_altaz(ap, gha, dec)
+    r0 = af.solve_fix(ap, ho[:,:3], hc[:,:3], zc[:,:3])
+    for k in ['hc', 'zn']:
+        data = {'hc' : hc.copy(), 'zn' : zc.copy()}
+        data[k][:,3] = np.nan
+        r = af.solve_fix(ap, ho, data['hc'], data['zn'])
+
+        assert np.max(np.fabs(r['pos'] - r0['pos'])) < 1e-10
+        assert np.max(np.fabs(r['ellipse'] - r0['ellipse'])) < 1e-10
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:05:31 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Tests of asyncio front-end for CelestialData queries!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import time
+import asyncio
+
+import asynccelestialdata as acd
+
+
+# CelestialData replacement counting evaluations
+class CountingData:
+    def __init__(self):
+
+        self.calls = []
+
+    def filter_list_of_int(self, list_data):
+
+        return [int(ld) for ld in list_data]
+
+    def get_objects_data(self, names, t, pos):
+
+        self.calls.append(['objects', list(names), t])
+        time.sleep(0.01)
+
+        return [{'cbody' : name, 't' : t} for name in names]
+
+    def get_all_celestial_objects_data(self, date, time_, pos):
+
+        self.calls.append(['all', date, time_])
+        time.sleep(0.01)
+
+        return [{'cbody' : name} for name in ['sun', 'moon', 'vega']]
+
+
+# Concurrent requests of different objects for one instant share one evaluation
+def test_objects_batch():
+
+    cd = CountingData()
+    names = ['sun', 'moon', 'venus', 'mars', 'jupiter', 'saturn', 'vega']
+
+    async def main():
+        async with acd.AsyncCelestialData(cd) as a:
+            d = [2024, 5, 3]
+            t = [12, 0, 0]
+            p = [45.0, 13.0, 0.0]
+            res = await asyncio.gather(*[a.get_celestial_data(n, d, t, p) for n in names + ['sun']])
+            res2 = await asyncio.gather(*[a.get_celestial_data(n, d, [13, 0, 0], p) for n in names])
+            return [res, res2, len(a.pending), len(a.batches)]
+
+    [res, res2, npending, nbatches] = asyncio.run(main())
+
+    assert [r['cbody'] for r in res] == names + ['sun']
+    assert [r['t'][3] for r in res2] == [13]*len(names)
+    assert len(cd.calls) == 2
+    assert cd.calls[0][1] == names
+    assert npending == 0 and nbatches == 0
+
+
+# Objects requested while the batch is running start a new batch, objects of
+# the running batch join it
+def test_running_batch():
+
+    cd = CountingData()
+
+    async def main():
+        async with acd.AsyncCelestialData(cd) as a:
+            d = [2024, 5, 3]
+            t = [12, 0, 0]
+            f1 = asyncio.ensure_future(a.get_celestial_data('sun', d, t, None))
+            await asyncio.sleep(0.005)
+            f2 = asyncio.ensure_future(a.get_celestial_data('sun', d, t, None))
+            f3 = asyncio.ensure_future(a.get_celestial_data('vega', d, t, None))
+            return await asyncio.gather(f1, f2, f3)
+
+    res = asyncio.run(main())
+
+    assert [r['cbody'] for r in res] == ['sun', 'sun', 'vega']
+    assert [c[1] for c in cd.calls] == [['sun'], ['vega']]
+
+
+# Object request joins running request of all objects
+def test_join_all():
+
+    cd = CountingData()
+
+    async def main():
+        async with acd.AsyncCelestialData(cd) as a:
+            d = [2024, 5, 3]
+            t = [12, 0, 0]
+            f1 = asyncio.ensure_future(a.get_all_celestial_objects_data(d, t, None))
+            await asyncio.sleep(0)
+            f2 = asyncio.ensure_future(a.get_celestial_data('moon', d, t, None))
+            return await asyncio.gather(f1, f2)
+
+    res = asyncio.run(main())
+
+    assert res[1]['cbody'] == 'moon'
+    assert len(cd.calls) == 1 and cd.calls[0][0] == 'all'
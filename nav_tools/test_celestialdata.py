@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:10:44 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Tests of CelestialData databases and queries!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import os
+import pytest
+import numpy as np
+
+import celestialdata as cdata
+
+# data path of astronomical databases (de421.bsp, finals2000A.all, ...),
+# tests which need them are skipped when they are not found
+data_path = os.environ.get('NAV_DATA_PATH', os.path.dirname(os.path.abspath(__file__)))
+
+
+# returns CelestialData object of the data path, test is skipped without data
+def get_cd(**kwargs):
+
+    if not(os.path.exists(data_path + '/de421.bsp')):
+        pytest.skip('no astronomical databases in {:s} (set NAV_DATA_PATH)'.format(data_path))
+
+    return cdata.CelestialData.shared(data_path, offline=True, iers_policy='extrapolate', **kwargs)
+
+
+# Offline mode does not download missing databases
+def test_offline_missing_data(tmp_path):
+
+    cd = cdata.CelestialData(str(tmp_path), offline=True)
+
+    with pytest.raises(AssertionError):
+        cd.solar_db
+    with pytest.raises(AssertionError):
+        cd.df
+
+    assert os.listdir(str(tmp_path)) == []
+
+
+
+# Time scale is built from the IERS database binary cache, which is rebuilt
+# when the database is newer, and agrees with the skyfield time scale of the
+# database; old database is not refreshed in offline mode
+def test_iers_timescale(tmp_path):
+
+    import shutil
+    import skyfield.api as sfa
+
+    db = 'finals2000A.all'
+    if not(os.path.exists(data_path + '/' + db)):
+        pytest.skip('no IERS database in {:s} (set NAV_DATA_PATH)'.format(data_path))
+
+    with pytest.raises(AssertionError):
+        cdata.CelestialData(str(tmp_path), iers_policy='never')
+
+    path = str(tmp_path)
+    shutil.copy(data_path + '/' + db, path)
+    ts0 = sfa.Loader(path).timescale(builtin=False)
+    os.utime(path + '/' + db, (0, 0))
+
+    ts = cdata.CelestialData(path, offline=True, iers_policy='refresh').ts
+    assert os.path.exists(path + '/finals2000A.npz')
+    assert os.path.getmtime(path + '/' + db) == 0
+    t = [ts.utc(2024, 5, 3, 12, 0, 0), ts0.utc(2024, 5, 3, 12, 0, 0)]
+    assert np.fabs(t[0].ut1 - t[1].ut1)*86400.0 < 1e-6
+    assert np.fabs(t[0].tt - t[1].tt)*86400.0 < 1e-6
+
+    # cache is used without the text database
+    os.remove(path + '/' + db)
+    ts1 = cdata.CelestialData(path, offline=True, iers_policy='extrapolate').ts
+    assert ts1.utc(2024, 5, 3, 12, 0, 0).ut1 == t[0].ut1
+
+
+# returns largest differences of celestial data d0 - d1 for keys, angles are
+# compared modulo 360 degrees
+def get_diff(d0, d1, keys):
+
+    err = {}
+    for k in keys:
+        err[k] = np.max(np.fabs(np.mod(np.asarray(d0[k]) - np.asarray(d1[k]) + 180.0, 360.0) - 180.0))
+
+    return err
+
+
+# Series of a celestial object agrees with scalar get_celestial_data, for
+# a single position and for a position per time
+def test_celestial_data_series():
+
+    cd = get_cd()
+    times = [[2024, 5, 3, h, m, 0] for h in range(0, 24, 5) for m in [0, 17]]
+    keys = ['dec', 'gha', 'gha_a', 'sha', 'hp', 'sd', 'hc', 'wc', 'lha']
+    track = [[45.5 - i, 13.7 + 2*i, 0.0] for i in range(len(times))]
+
+    for name in ['sun', 'moon', 'venus', 'saturn', 'vega', 'acrux']:
+        for pos in [[45.5, 13.7, 0.0], track]:
+            s = cd.get_celestial_data_series(name, times, pos)
+            assert s['cbody'] == name
+            for [i, t] in enumerate(times):
+                p = pos[i] if pos is track else pos
+                d = cd.get_celestial_data(name, t[0:3], t[3:6], p)
+                err = get_diff({k : s[k][i] for k in keys}, d, keys)
+                assert max(err.values()) < 1e-9
+
+        # without position only astro data
+        s = cd.get_celestial_data_series(name, times)
+        assert not('hc' in s)
+        assert get_diff(s, cd.get_celestial_data_series(name, times, track), ['dec', 'gha', 'sha'])['gha'] < 1e-9
+
+
+# Vectorized data of all navigational stars agrees with single star queries
+# and with apparent places of skyfield stars (within 4 seconds of arc)
+def test_all_stars_data():
+
+    import skyfield.api as sfa
+
+    cd = get_cd()
+    t = [2024, 5, 3, 21, 17, 30]
+    pos = [45.5, 13.7, 0.0]
+    sd = cd.get_all_stars_data(t[0:3], t[3:6], pos)
+    assert sd['cbody'] == list(cd.star_db.keys())
+
+    earth = cd.solar_db['earth'][1]
+    observer = (earth + sfa.wgs84.latlon(pos[0], pos[1], pos[2])).at(cd.ts.ut1(*t))
+    for [i, name] in enumerate(sd['cbody']):
+        d = cd.get_celestial_data(name, t[0:3], t[3:6], pos)
+        err = get_diff({k : sd[k][i] for k in ['dec', 'gha', 'sha', 'hc', 'wc', 'lha']}, d, ['dec', 'gha', 'sha', 'hc', 'wc', 'lha'])
+        assert max(err.values()) < 1e-9
+
+        star = sfa.Star.from_dataframe(cd.df.loc[cd.star_db[name][1]])
+        [alt, az, dist] = observer.observe(star).apparent().altaz()
+        err = get_diff({'hc' : alt.degrees, 'wc' : az.degrees}, {'hc' : sd['hc'][i], 'wc' : sd['wc'][i]}, ['hc', 'wc'])
+        assert err['hc'] < 1e-3 and err['wc'] < 1e-3/np.cos(alt.radians)
+
+
+# Navigational star subset is extracted from the Hipparcos catalog once and
+# later loaded without the catalog, additional stars extend the subset
+def test_star_subset_cache(tmp_path):
+
+    import shutil
+    from skyfield.data import hipparcos
+
+    cat = os.path.basename(hipparcos.URL)
+    if not(os.path.exists(data_path + '/' + cat)):
+        pytest.skip('no Hipparcos catalog in {:s} (set NAV_DATA_PATH)'.format(data_path))
+
+    path = str(tmp_path)
+    shutil.copy(data_path + '/' + cat, path)
+    with open(path + '/' + cat, 'rb') as f:
+        df_cat = hipparcos.load_dataframe(f)
+
+    df = cdata.CelestialData(path, offline=True).df
+    assert os.path.exists(path + '/nav_stars.npz')
+    assert np.array_equal(df.to_numpy(), df_cat.loc[df.index].to_numpy(), equal_nan=True)
+
+    # subset is loaded without the catalog
+    os.remove(path + '/' + cat)
+    df1 = cdata.CelestialData(path, offline=True).df
+    assert np.array_equal(df1.index, df.index)
+    assert np.array_equal(df1.to_numpy(), df.to_numpy(), equal_nan=True)
+
+    # additional star is missing in the subset, the catalog is read again
+    hip = int(sorted(set(df_cat.index) - set(df.index))[0])
+    with pytest.raises(AssertionError):
+        cdata.CelestialData(path, star_hips=[hip], offline=True).df
+
+    shutil.copy(data_path + '/' + cat, path)
+    df2 = cdata.CelestialData(path, star_hips=[hip], offline=True).df
+    assert set(df2.index) == set(df.index) | set([hip])
+
+
+# Resources are loaded on the first use, once also for concurrent first use
+def test_lazy_loading():
+
+    import threading
+
+    get_cd()
+    cd = cdata.CelestialData(data_path, offline=True, iers_policy='extrapolate')
+    assert cd.get_load_report() == {}
+
+    calls = []
+    get_solar_db = cd.get_solar_db
+    def counting_solar_db(load, ephmid):
+        calls.append(ephmid)
+        return get_solar_db(load, ephmid)
+    cd.get_solar_db = counting_solar_db
+
+    res = []
+    def worker():
+        res.append(cd.solar_db['earth'][1])
+    threads = [threading.Thread(target=worker) for i in range(8)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    assert calls == [0]
+    assert all(r is res[0] for r in res)
+    assert list(cd.get_load_report().keys()) == ['ephemeris']
+
+    # solar objects need no star catalog
+    cd.get_celestial_data('sun', [2024, 5, 3], [12, 0, 0], [45.5, 13.7, 0.0])
+    assert not('stars' in cd.get_load_report())
+    cd.get_celestial_data('vega', [2024, 5, 3], [12, 0, 0], [45.5, 13.7, 0.0])
+    assert set(cd.get_load_report().keys()) == set(['ephemeris', 'timescale', 'stars'])
+
+
+# Shared objects are kept per data path and constructor options
+def test_shared(tmp_path):
+
+    path = str(tmp_path)
+    cd = cdata.CelestialData.shared(path, offline=True)
+
+    assert cdata.CelestialData.shared(path + '/', offline=True) is cd
+    assert cdata.CelestialData.shared(path, offline=True, star_hips=[1, 2]) is cdata.CelestialData.shared(path, star_hips=(1, 2), offline=True)
+    assert cdata.CelestialData.shared(path, offline=True, star_hips=[1, 2]) is not cd
+    assert cdata.CelestialData.shared(path, offline=True, iers_policy='extrapolate') is not cd
+
+    cd1 = cdata.CelestialData.shared(path, offline=True, iers_policy='extrapolate', cache_size=16)
+    assert cd1.offline and cd1.iers_policy == 'extrapolate' and cd1.cache_size == 16
+
+
+# Instant cache keeps the last cache_size instants, cached data agree with
+# data computed on an empty cache
+def test_instant_cache():
+
+    get_cd()
+    cd = cdata.CelestialData(data_path, offline=True, iers_policy='extrapolate', cache_size=2)
+    times = [[2024, 5, 3, 12, 0, s] for s in range(3)]
+    pos = [45.5, 13.7, 0.0]
+
+    inst = cd.get_instant(times[0])
+    assert cd.get_instant(times[0]) is inst
+    cd.get_instant(times[1])
+    cd.get_instant(times[0])
+    cd.get_instant(times[2])
+    assert list(cd.instant_cache.keys()) == [tuple(times[0]), tuple(times[2])]
+    assert cd.get_observer(times[0], pos) is cd.get_observer(times[0], pos)
+    assert np.fabs(cd.get_aries_gha(times[0]) - 15.0*cd.ts.ut1(*times[0]).gast) < 1e-12
+
+    data = [cd.get_celestial_data(name, t[0:3], t[3:6], pos) for name in ['moon', 'vega'] for t in times]
+    cd.instant_cache.clear()
+    data0 = [cd.get_celestial_data(name, t[0:3], t[3:6], pos) for name in ['moon', 'vega'] for t in times]
+    assert data == data0
+    assert len(cd.instant_cache) == 2
+
+
+# Single pass altitude and azimuth differ from the separate topocentric
+# observation only by diurnal aberration (< 0.5 seconds of arc)
+def test_single_pass_altaz():
+
+    cd = get_cd()
+    rng = np.random.default_rng(2)
+
+    for i in range(30):
+        t = [2024, int(rng.integers(1, 13)), int(rng.integers(1, 28)), int(rng.integers(0, 24)), int(rng.integers(0, 60)), 0]
+        pos = [float(rng.uniform(-70, 70)), float(rng.uniform(-180, 180)), 0.0]
+        for name in cd.solar + ['vega', 'acrux', 'sirius', 'polaris']:
+            d = cd.get_celestial_data(name, t[0:3], t[3:6], pos)
+            if name in cd.solar:
+                a = cd.get_planet_altaz(name, t, pos)
+            else:
+                a = cd.get_star_altaz(name, t, pos)
+
+            err = get_diff({'hc' : a['alt'], 'wc' : a['az']}, d, ['hc', 'wc'])
+            assert err['hc'] < 0.5/3600.0
+            assert err['wc']*np.cos(np.radians(a['alt'])) < 0.5/3600.0
+
+
+# Star and planet objects are built once and hold no per-call state, so
+# concurrent queries give the same results as sequential ones
+def test_body_registry():
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    cd = get_cd()
+    names = cd.solar + ['vega', 'acrux', 'sirius']
+    pos = [45.5, 13.7, 0.0]
+    times = [[2024, 5, 3, h, 30, 0] for h in range(24)]
+
+    bodies = [cd.get_body_object(name) for name in names]
+    attrs = [dict(vars(b[1])) for b in bodies]
+
+    def query(t):
+        return [cd.get_celestial_data(name, t[0:3], t[3:6], pos) for name in names]
+
+    data = [query(t) for t in times]
+    with ThreadPoolExecutor(8) as ex:
+        data1 = list(ex.map(query, times))
+
+    assert data1 == data
+    for [i, name] in enumerate(names):
+        assert cd.get_body_object(name)[1] is bodies[i][1]
+        assert vars(bodies[i][1]).keys() == attrs[i].keys()
+
+
+# Streamed visible objects agree with the full computation of all objects
+# at every fix, also with an azimuth sector across north
+def test_stream_visible_objects():
+
+    cd = get_cd()
+    # fixes every 5 s from 20:50, vessel sails north at 20 kn
+    fixes = []
+    for s in range(75000, 75600, 5):
+        fixes.append([[2024, 5, 3, s//3600, (s//60) % 60, s % 60], [45.5 + (s - 75000)/3600.0*20/60, 13.7, 0.0]])
+
+    for [h_min, h_max, az_min, az_max] in [[0.0, 90.0, 0.0, 360.0], [15.0, 60.0, 300.0, 60.0]]:
+        stream = cd.stream_visible_objects(fixes, h_min, h_max, az_min, az_max)
+        for [[t, pos], vis] in zip(fixes, stream):
+            names = []
+            for d in cd.get_all_celestial_objects_data(t[0:3], t[3:6], pos):
+                if d['hc'] < h_min or d['hc'] > h_max:
+                    continue
+                if az_min <= az_max and (d['wc'] < az_min or d['wc'] > az_max):
+                    continue
+                if az_min > az_max and (d['wc'] < az_min and d['wc'] > az_max):
+                    continue
+                names.append(d['cbody'])
+            assert sorted(d['cbody'] for d in vis) == sorted(names)
+
+
+# Sun calendar of a fixed position agrees with skyfield dark_twilight_day
+# transitions (within 5 s), events on a track are at the event altitude
+def test_sun_calendar():
+
+    import skyfield.api as sfa
+    from skyfield import almanac as sfalm
+
+    cd = get_cd()
+    trans = {(3, 4) : 'sunrise', (4, 3) : 'sunset', (2, 3) : 'civil_dawn', (3, 2) : 'civil_dusk', (1, 2) : 'nautical_dawn', (2, 1) : 'nautical_dusk'}
+
+    for pos in [[45.5, 13.7, 0.0], [-33.9, 151.2, 0.0], [60.0, -20.0, 0.0], [0.0, -120.0, 0.0]]:
+        cal = cd.get_sun_calendar([2024, 3, 1], [2024, 3, 10], [[[2024, 3, 1, 0, 0, 0], pos]])
+        assert len(cal['date']) == 10
+
+        f = sfalm.dark_twilight_day(cd.solar_eph, sfa.wgs84.latlon(pos[0], pos[1]))
+        t0 = cd.ts.utc(2024, 3, 1)
+        [t, y] = sfalm.find_discrete(t0, cd.ts.utc(2024, 3, 11), f)
+        y0 = np.concatenate(([f(t0)], y[:-1]))
+        nn = 0
+        for [k, tk] in enumerate(t):
+            if (y0[k], y[k]) in trans:
+                ev = np.datetime64(tk.utc_datetime().replace(tzinfo=None), 'ms')
+                i = int((ev.astype('datetime64[D]') - cal['date'][0]).astype(int))
+                assert np.fabs((cal[trans[(y0[k], y[k])]][i] - ev).astype(float)) < 5000.0
+                nn += 1
+        assert nn == 60
+
+    # sailing north at 20 kn, polar day from 70 N
+    track = [[[2024, 6, 1, 0, 0, 0], [50.0, -20.0, 0.0]], [[2024, 6, 4, 0, 0, 0], [74.0, -20.0, 0.0]]]
+    cal = cd.get_sun_calendar([2024, 6, 1], [2024, 6, 5], track)
+    assert np.all(np.isnat(cal['sunrise'][3:]))
+    for [k, h0] in [['sunrise', -0.8333], ['sunset', -0.8333], ['civil_dawn', -6.0], ['civil_dusk', -6.0]]:
+        ev = cal[k][~np.isnat(cal[k])]
+        s = (ev - np.datetime64('2024-06-01')).astype(float)/1000.0
+        times = [[2024, 6, 1, 0, 0, ss] for ss in s]
+        pos = [[lat, -20.0, 0.0] for lat in np.interp(s, [0.0, 3*86400.0], [50.0, 74.0])]
+        d = cd.get_celestial_data_series('sun', times, pos)
+        assert len(ev) > 0 and np.max(np.fabs(d['hc'] - h0)) < 0.02
+
+
+# Meridian transits agree with skyfield find_discrete of meridian_transits
+# (within 0.1 s), altitudes at transit agree with the object altitude
+# (within 0.02 deg, spherical Earth parallax of the Moon)
+def test_transits():
+
+    import skyfield.api as sfa
+    from skyfield import almanac as sfalm
+
+    cd = get_cd()
+    dates = [[2024, 5, d] for d in range(1, 11)]
+    day0 = np.datetime64('2024-05-01')
+
+    for name in ['sun', 'moon', 'venus', 'vega']:
+        if name in cd.solar:
+            body = cd.solar_eph[name]
+        else:
+            body = sfa.Star.from_dataframe(cd.df.loc[cd.star_db[name][1]])
+
+        for pos in [[45.5, 13.7], [-33.9, 151.2], [10.0, -170.0]]:
+            tr = cd.get_transits(name, dates, pos)
+
+            f = sfalm.meridian_transits(cd.solar_eph, body, sfa.wgs84.latlon(pos[0], pos[1]))
+            [t, y] = sfalm.find_discrete(cd.ts.utc(2024, 5, 1), cd.ts.utc(2024, 5, 11), f)
+            for [tk, yk] in zip(t, y):
+                ev = np.datetime64(tk.utc_datetime().replace(tzinfo=None), 'ms')
+                i = int((ev.astype('datetime64[D]') - day0).astype(int))
+                key = 'upper' if yk == 1 else 'lower'
+                assert np.fabs((tr[key][i] - ev).astype(float)) < 100.0
+            assert np.sum(~np.isnat(tr['upper'])) + np.sum(~np.isnat(tr['lower'])) == len(t)
+
+            for key in ['upper', 'lower']:
+                ok = ~np.isnat(tr[key])
+                s = (tr[key][ok] - day0).astype(float)/1000.0
+                d = cd.get_celestial_data_series(name, [[2024, 5, 1, 0, 0, ss] for ss in s], [pos[0], pos[1], 0.0])
+                assert np.max(np.fabs(d['hc'] - tr['alt_' + key][ok])) < 0.02
+
+    # one date at several positions
+    tr = cd.get_transits('sun', [2024, 5, 3], [[45.5, 13.7], [45.5, 28.7]])
+    assert np.fabs((tr['upper'][0] - tr['upper'][1]).astype(float) - 3600000.0) < 5000.0
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:17 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Tests of geodesic calculations on the WGS84 ellipsoid!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import numpy as np
+
+import geodesic as gd
+import greatcircle as gc
+
+
+# Nearly antipodal positions are solved, direct problem returns to the
+# second position
+def test_inverse_antipodal():
+
+    [d, a1, a2] = gd.inverse(0.0, 0.0, 0.0, 179.9)
+    assert abs(d - 10800.76) < 0.01
+
+    rng = np.random.default_rng(3)
+    fi0 = rng.uniform(-60, 60, 2000)
+    la0 = rng.uniform(-180, 180, 2000)
+    fi1 = -fi0 + rng.uniform(-0.3, 0.3, 2000)
+    la1 = gd.wrapLong(la0 + 180 + rng.uniform(-0.5, 0.5, 2000))
+
+    [d, a1, a2] = gd.inverse(fi0, la0, fi1, la1)
+    [fi, la, a] = gd.direct(fi0, la0, a1, d)
+
+    assert not(np.any(np.isnan(d)))
+    assert np.max(np.fabs(fi - fi1)) < 1e-8
+    assert np.max(np.fabs(gd.wrapLong(la - la1))) < 1e-8
+
+
+# Bisection solution agrees with converged Vincenty iteration
+def test_inverse_bisection():
+
+    rng = np.random.default_rng(4)
+    fi0 = rng.uniform(-89, 89, 2000)
+    la0 = rng.uniform(-180, 180, 2000)
+    fi1 = rng.uniform(-89, 89, 2000)
+    la1 = rng.uniform(-180, 180, 2000)
+
+    U1 = np.arctan((1 - gd.Rf)*np.tan(np.radians(fi0)))
+    U2 = np.arctan((1 - gd.Rf)*np.tan(np.radians(fi1)))
+    L = np.radians(gd.nt.deltaLongArray(la0, la1))
+
+    [d, a1, a2] = gd.inverse(fi0, la0, fi1, la1)
+    [db, b1, b2] = gd.inverseBisection(U1, U2, L)
+
+    assert np.max(np.fabs(d - db)) < 1e-6
+    assert np.max(np.fabs(gd.wrapLong(a1 - b1))) < 1e-8
+    assert np.max(np.fabs(gd.wrapLong(a2 - b2))) < 1e-8
+
+
+# Identical positions give nan course and vertex for both earth models
+def test_identical_positions():
+
+    [d, w1, [fiv, lav]] = gc.getGCparameters([45.0, 10.0], [45.0, 10.0], 'wgs84')
+    assert d == 0.0 and np.isnan(w1) and np.isnan(fiv) and np.isnan(lav)
+
+    for model in ['sphere', 'wgs84']:
+        [d, w1, fiv, lav] = gc.getGCparametersArray([[45.0, 10.0]], [[45.0, 10.0]], model)
+        assert d[0,0] == 0.0 and np.isnan(w1[0,0]) and np.isnan(fiv[0,0]) and np.isnan(lav[0,0])
+
+
+# Rhumb line second problem returns to the end of general, near-parallel,
+# parallel and meridian legs
+def test_rhumb_round_trip():
+
+    rng = np.random.default_rng(5)
+    fi0 = rng.uniform(-80, 80, 4000)
+    la0 = rng.uniform(-180, 180, 4000)
+    fi1 = rng.uniform(-80, 80, 4000)
+    la1 = rng.uniform(-180, 180, 4000)
+    fi1[1000:2000] = fi0[1000:2000] + rng.choice([-1, 1], 1000)*10**rng.uniform(-12, -2, 1000)
+    fi1[2000:3000] = fi0[2000:3000]
+    la1[3000:] = la0[3000:]
+
+    [d, c] = gd.rhumbInverse(fi0, la0, fi1, la1)
+    [fi, la] = gd.rhumbDirect(fi0, la0, c, d)
+
+    assert np.max(np.fabs(fi - fi1)) < 1e-8
+    assert np.max(np.fabs(gd.wrapLong(la - la1))) < 1e-8
+
+    # departure of parallel legs is the arc of the parallel
+    dla = np.radians(np.fabs(gd.nt.deltaLongArray(la0[2000:3000], la1[2000:3000])))
+    assert np.allclose(d[2000:3000], dla*gd.getParallelRadius(fi0[2000:3000])/gd.NM, rtol=1e-12)
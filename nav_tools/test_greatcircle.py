@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:31:27 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Tests of great circle calculations!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import numpy as np
+
+import navtools as nt
+import greatcircle as gc
+
+
+# returns unit vectors (N,3) of positions (N,2) in decimal degrees
+def get_vectors(pts):
+
+    p = np.radians(np.asarray(pts, dtype=float).reshape(-1,2))
+
+    return np.column_stack((np.cos(p[:,0])*np.cos(p[:,1]), np.cos(p[:,0])*np.sin(p[:,1]), np.sin(p[:,0])))
+
+
+# returns routes [P0, P1] which do not pass a pole
+def get_routes(nn, seed):
+
+    rng = np.random.default_rng(seed)
+    routes = []
+    while len(routes) < nn:
+        P0 = [rng.uniform(-60, 60), rng.uniform(-180, 180)]
+        P1 = [rng.uniform(-60, 60), rng.uniform(-180, 180)]
+        if np.fabs(nt.deltaLong(P0[1], P1[1])) > 5:
+            routes.append([P0, P1])
+
+    return routes
+
+
+# Path points lie on the great circle of P0 and P1, longitudes are on the
+# dla grid, scalar midpoint is the same as the array one
+def test_path_points():
+
+    for [P0, P1] in get_routes(50, 1):
+        pts = gc.getPathPoints(P0, P1, 5)
+
+        n = np.cross(get_vectors(P0)[0], get_vectors(P1)[0])
+        assert np.max(np.fabs(get_vectors(pts) @ n)) < 1e-12*np.linalg.norm(n) + 1e-14
+
+        la = nt.getPathPointsLong(P0[1], P1[1], 5)
+        assert np.array_equal(pts[:,1], la)
+
+        fi = gc.getMidPositions(P0, P1, pts[:,1])
+        assert [gc.getMidPosition(P0, P1, v) for v in pts[:,1]] == list(fi)
+
+
+# Points at equal distances are dd apart along the great circle
+def test_path_points_dist():
+
+    for [P0, P1] in get_routes(50, 2):
+        pts = gc.getPathPointsDist(P0, P1, 100.0)
+        d = gc.getGCparameters(P0, P1)[0]
+
+        legs = [gc.getGCparameters(pts[i], pts[i+1])[0] for i in range(len(pts) - 1)]
+        assert np.allclose(legs[:-1], 100.0, atol=1e-8)
+        assert np.fabs(np.sum(legs) - d) < 1e-7
+        assert np.allclose(pts[-1], P1, atol=1e-9)
+
+
+# consecutive waypoints of GC to RL conversion are distinct, also for
+# endpoints on the longitude grid, and all route legs have length
+def test_convert_gc2rl():
+
+    import route as rt
+
+    routes = get_routes(200, 3) + [[[40, -125.0], [35, 170.0]], [[-20, 125.0], [-45, 85.0]], [[10, 3.0], [30, 60.0]]]
+    for [P0, P1] in routes:
+        for dla in [1, 5, 10]:
+            pts = gc.convertGC2RL(P0, P1, dla)
+            assert np.all(np.any(pts[1:] != pts[:-1], axis=1))
+            assert np.all(rt.Route(pts).get_legs()[0] > 0)
+
+        pts = gc.getPathPointsDist(P0, P1, 100)
+        assert np.all(np.any(pts[1:] != pts[:-1], axis=1))
+
+    pts = gc.dropDuplicatePoints([[1, 2], [1, 2], [3, 4], [3, 4]])
+    assert np.array_equal(pts, [[1, 2], [3, 4]])
+
+
+# Parameters of all pairs agree with scalar getGCparameters, also when
+# computed in blocks and for pairs on one meridian
+def test_gc_parameters_array():
+
+    rng = np.random.default_rng(5)
+    P0 = np.column_stack((rng.uniform(-70, 70, 20), rng.uniform(-180, 180, 20)))
+    P1 = np.column_stack((rng.uniform(-70, 70, 30), rng.uniform(-180, 180, 30)))
+
+    for model in ['sphere', 'wgs84']:
+        [d, w1, fiv, lav] = gc.getGCparametersArray(P0, P1, model)
+        assert np.shape(d) == (20, 30)
+        for i in range(20):
+            for j in range(30):
+                [ds, ws, [fs, ls]] = gc.getGCparameters(P0[i], P1[j], model)
+                assert np.fabs(d[i,j] - ds) < 1e-8
+                assert np.fabs(nt.deltaLong(ws, w1[i,j])) < 1e-8
+                assert np.fabs(fiv[i,j] - fs) < 1e-8
+                assert np.fabs(nt.deltaLong(ls, lav[i,j])) < 1e-8
+
+        for [i, j, par] in gc.getGCparametersChunks(P0, P1, 7, 11, model):
+            for k in range(4):
+                assert np.array_equal(par[k], [d, w1, fiv, lav][k][i:i+7, j:j+11], equal_nan=True)
+
+    # pairs on one meridian
+    [d, w1, fiv, lav] = gc.getGCparametersArray([[10.0, 20.0], [-10.0, 20.0]], [[30.0, 20.0]])
+    assert np.allclose(d[:,0], [1200.0, 2400.0])
+    assert np.allclose(w1[:,0], [0.0, 0.0], atol=1e-5)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:41:05 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Tests of position string parsing!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import numpy as np
+
+import navtools as nt
+
+
+# Printed, leading orientation and NMEA positions give the same position
+def test_parse_position_forms():
+
+    s = ['φ=41°45.00′N; λ=012°30.00′W',
+         '41°45.00′N 012°30.00′W',
+         'N41 45.0 W012 30.0',
+         '4145.00,N,01230.00,W',
+         '4145.00N 01230.00W',
+         '41 45 N; 12 30 W']
+
+    [fi, la] = nt.parsePositionArray(s)
+
+    assert np.allclose(fi, 41.75)
+    assert np.allclose(la, -12.5)
+
+
+# Single angles in NMEA and leading orientation form
+def test_parse_dm_forms():
+
+    dd = nt.parseDMArray(['4145N', '4145.00S', '01230.00E', 'W012 30.0', '-12°30.00′', '123.5'])
+
+    assert np.allclose(dd, [41.75, -41.75, 12.5, -12.5, -12.5, 123.5])
+
+
+# Minutes or seconds over 60 and angles out of range give nan
+def test_parse_out_of_range():
+
+    dd = nt.parseDMArray(['41°75.00′N', '41°45′70″N', '95°00.00′N', '4175.00N', '19000.00E', ''])
+    assert np.all(np.isnan(dd))
+
+    [fi, la] = nt.parsePositionArray(['95 0 N; 12 30 E', '41 45 N; 190 0 E', '-91.0; 12.0', '41.0; 181.0'])
+    assert np.array_equal(np.isnan(fi), [True, False, True, False])
+    assert np.array_equal(np.isnan(la), [False, True, False, True])
+
+
+# Printed positions are parsed back
+def test_print_parse():
+
+    rng = np.random.default_rng(5)
+    p = np.column_stack((rng.uniform(-89, 89, 1000), rng.uniform(-179, 179, 1000)))
+    p = np.round(p*6000.0)/6000.0
+
+    [fi, la] = nt.parsePositionArray(nt.printPositionArray(p[:,0], p[:,1]))
+
+    assert np.max(np.fabs(fi - p[:,0])) < 1e-9
+    assert np.max(np.fabs(la - p[:,1])) < 1e-9
+
+
+# Printed positions on a dense grid, including the 60' carry of the
+# formatter ("41°60.00′N"), are parsed back
+def test_print_parse_grid():
+
+    fi = np.linspace(-89.9, 89.9, 400001)
+    la = np.linspace(-179.9, 179.9, 400001)
+
+    [fi_p, la_p] = nt.parsePositionArray(nt.printPositionArray(fi, la))
+
+    assert not(np.any(np.isnan(fi_p)) or np.any(np.isnan(la_p)))
+    assert np.max(np.fabs(fi_p - fi)) < 0.0051/60.0
+    assert np.max(np.fabs(la_p - la)) < 0.0051/60.0
+
+    assert nt.parseDMArray([nt.prettyPrintLat(41 + 59.996/60)])[0] == 42.0
+
+
+# Strings which are not angle forms give nan, not a wrong number
+def test_parse_other_forms():
+
+    dd = nt.parseDMArray(['1e3', '41.5 30', '41..5', '41 - 5', '41 60.5 N', 'N41 45 S', '1 2 3 4'])
+    assert np.all(np.isnan(dd))
+
+    [fi, la] = nt.parsePositionArray(['41.5, -12.25'])
+    assert np.isnan(fi[0]) and np.isnan(la[0])
+
+
+# Array helpers give the scalar results element by element
+def test_array_helpers():
+
+    rng = np.random.default_rng(6)
+    la0 = np.round(rng.uniform(-180, 180, 500), 1)
+    la1 = np.round(rng.uniform(-180, 180, 500), 1)
+    la1[:50] = la0[:50]
+
+    dl = nt.deltaLong(la0, la1)
+    assert np.array_equal(dl, [nt.deltaLong(float(a), float(b)) for [a, b] in zip(la0, la1)])
+
+    fi = np.round(rng.uniform(-80, 80, 500), 1)
+    fi[50:100] = 0.0
+    w = rng.uniform(0, np.pi/2, 500)
+    c = nt.navAngle(w, fi, dl)
+    assert np.array_equal(c, [nt.navAngle(float(a), float(b), float(d)) for [a, b, d] in zip(w, fi, dl)])
+    assert np.allclose(nt.mathAngle(c), [nt.mathAngle(float(a)) for a in c])
+
+    [fm, lm] = nt.getRouteCentralPoint([fi, fi[::-1]], [la0, la1])
+    for i in range(500):
+        assert np.allclose([fm[i], lm[i]], nt.getRouteCentralPoint([fi[i], fi[::-1][i]], [la0[i], la1[i]]))
+
+
+# Degrees, minutes and seconds are read along the last axis for lists and
+# arrays, scalar results are numpy floats
+def test_dms2dd():
+
+    x = [[41, 45], [-12, 30]]
+    assert np.array_equal(nt.dms2dd(x), [41.75, -12.5])
+    assert np.array_equal(nt.dms2dd(np.array(x)), [41.75, -12.5])
+    assert np.allclose(nt.dms2dd([[41, 45, 30.0]]), [41.758333333333])
+
+    d = nt.dms2dd([41, 45])
+    assert d == 41.75 and isinstance(d, np.float64)
+
+    [dd, mm, ss] = nt.dd2dms(np.array([41.75, -12.5]))
+    assert np.array_equal(nt.dms2dd(np.column_stack((dd, mm))), [41.75, -12.5])
+
+
+# Orientation gives the sign also for 0 degrees, negative degrees turn it
+def test_nav2dd():
+
+    x = [[41, 45, 'N'], [-41, 45, 'N'], [-41, 45, 'S'], [0, 30, 'S'], [12, 30, 'W']]
+    dd = [41.75, -41.75, 41.75, -0.5, -12.5]
+
+    for i in range(len(x)):
+        d = nt.nav2dd(x[i])
+        assert d == dd[i] and isinstance(d, np.float64)
+
+    xa = [np.array([v[k] for v in x]) for k in range(3)]
+    assert np.array_equal(nt.nav2dd(xa), dd)
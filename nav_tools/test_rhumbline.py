@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:52:09 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Tests of rhumb line calculations!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import numpy as np
+
+import rhumbline as rl
+
+
+# returns legs [p0, p1] (N,2) with general, near-parallel (latitude
+# difference from 10^dmin degrees), parallel and meridian legs
+def get_legs(nn, seed, dmin=-9):
+
+    rng = np.random.default_rng(seed)
+    p0 = np.column_stack((rng.uniform(-80, 80, nn), rng.uniform(-180, 180, nn)))
+    p1 = np.column_stack((rng.uniform(-80, 80, nn), rng.uniform(-180, 180, nn)))
+
+    k = nn//4
+    p1[k:2*k,0] = p0[k:2*k,0] + rng.choice([-1, 1], k)*10**rng.uniform(dmin, -2, k)
+    p1[2*k:3*k,0] = p0[2*k:3*k,0]
+    p1[3*k:,1] = p0[3*k:,1]
+
+    return [p0, p1]
+
+
+# Array versions give the scalar results within 1e-9 relative, also for
+# near-parallel legs
+def test_arrays_scalar():
+
+    [p0, p1] = get_legs(4000, 1)
+
+    [d, w] = rl.rhumbLineP1Array(p0, p1)
+    ds = np.array([rl.rhumbLineP1(p0[i], p1[i]) for i in range(len(p0))])
+
+    assert np.max(np.fabs(d - ds[:,0])/ds[:,0]) < 1e-9
+    assert np.max(np.fabs(w - ds[:,1])) < 1e-9
+
+    [fi, la] = rl.rhumbLineP2Array(p0, d, w)
+    ps = np.array([rl.rhumbLineP2(p0[i], d[i], w[i]) for i in range(len(p0))])
+
+    assert np.max(np.fabs(fi - ps[:,0])) < 1e-9
+    assert np.max(np.fabs(la - ps[:,1])) < 1e-9
+
+
+# Second problem returns to the end of the leg, latitude differences below
+# 1e-8 rad are parallels on the sphere, so near-parallel legs start above
+def test_round_trip():
+
+    for [model, dmin] in [['sphere', -6], ['wgs84', -12]]:
+        [p0, p1] = get_legs(4000, 2, dmin)
+
+        [d, w] = rl.rhumbLineP1Array(p0, p1, model)
+        [fi, la] = rl.rhumbLineP2Array(p0, d, w, model)
+
+        assert np.max(np.fabs(fi - p1[:,0])) < 1e-8
+        assert np.max(np.fabs(np.mod(la - p1[:,1] + 180, 360) - 180)) < 1e-8
+
+
+# Track legs are the legs between consecutive points
+def test_track():
+
+    [p0, p1] = get_legs(100, 3)
+    pts = np.vstack((p0, p1))
+
+    [d, w] = rl.rhumbLineTrack(pts)
+    [da, wa] = rl.rhumbLineP1Array(pts[:-1], pts[1:])
+
+    assert np.array_equal(d, da) and np.array_equal(w, wa)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:21:08 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Tests of route of rhumb line legs!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import numpy as np
+
+import rhumbline as rl
+import route as rt
+
+
+# returns random waypoints (N,2) crossing the date line
+def get_waypoints(nn, seed):
+
+    rng = np.random.default_rng(seed)
+    la = np.cumsum(rng.uniform(1, 8, nn)) + 150
+    la = np.where(la > 180, la - 360, la)
+
+    return np.column_stack((np.cumsum(rng.uniform(-3, 3, nn)) + 20, la))
+
+
+# Legs and cumulative distances agree with scalar rhumb lines, positions
+# at distance agree with scalar rhumbLineP2
+def test_legs_positions():
+
+    pts = get_waypoints(15, 1)
+    for model in ['sphere', 'wgs84']:
+        r = rt.Route(pts, model)
+        [leg_d, leg_c, cum_d] = r.get_legs()
+
+        assert r.get_size() == 15
+        for i in range(14):
+            [d, c] = rl.rhumbLineP1(pts[i], pts[i+1], model)
+            assert np.fabs(leg_d[i] - d) < 1e-8 and np.fabs(leg_c[i] - c) < 1e-8
+        assert np.fabs(cum_d[-1] - np.sum(leg_d)) < 1e-8
+        assert r.get_distance_remaining(0) == r.get_distance()
+
+        s = np.random.default_rng(2).uniform(0, r.get_distance(), 100)
+        pos = r.get_position_at(s)
+        for k in range(100):
+            i = r.get_leg_index(s[k])
+            assert cum_d[i] <= s[k] < cum_d[i+1]
+            [fi, la] = rl.rhumbLineP2(pts[i], s[k] - cum_d[i], leg_c[i], model)
+            la = la - 360 if la > 180 else (la + 360 if la < -180 else la)
+            assert np.fabs(pos[k,0] - fi) < 1e-8 and np.fabs(pos[k,1] - la) < 1e-8
+
+        # distances out of the route give the first and the last waypoint
+        assert np.allclose(r.get_position_at(-10.0), pts[0])
+        assert np.allclose(r.get_position_at(r.get_distance() + 10.0), pts[-1])
+
+
+# Moving a waypoint updates legs like a new route
+def test_set_waypoint():
+
+    pts = get_waypoints(10, 3)
+    for model in ['sphere', 'wgs84']:
+        r = rt.Route(pts.copy(), model)
+        for [i, p] in [[0, [25.0, 149.0]], [4, [18.0, 170.5]], [-1, [30.0, -150.0]]]:
+            r.set_waypoint(i, p)
+            pts[i] = p
+            r1 = rt.Route(pts.copy(), model)
+            for [a, b] in zip(r.get_legs(), r1.get_legs()):
+                assert np.max(np.fabs(a - b)) < 1e-8
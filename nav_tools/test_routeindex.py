@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:40 2026
+
+@author: sandro@fpp.uni-lj.si
+
+Tests of route spatial index!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import numpy as np
+
+import route as rt
+import routeindex as ri
+
+
+# Points on the route lie on rhumb line legs: zero cross track distance
+# and along track distance equal to the distance on the route
+def test_points_on_route():
+
+    rng = np.random.default_rng(1)
+    pts = np.column_stack((np.cumsum(rng.uniform(-3, 3, 20)) + 20, np.cumsum(rng.uniform(0, 8, 20)) - 120))
+
+    for model in ['sphere', 'wgs84']:
+        r = rt.Route(pts, model)
+        idx = ri.RouteIndex(r)
+
+        s = rng.uniform(0, r.get_distance(), 500)
+        q = idx.query(r.get_position_at(s))
+
+        assert np.max(np.fabs(q['xte'])) < 1e-6
+        assert np.max(np.fabs(q['dist'])) < 1e-6
+        assert np.max(np.fabs(q['along'] - s)) < 1e-6
+
+
+# Midpoint of a long east-west leg is on the parallel, not on the great circle
+def test_parallel_leg_midpoint():
+
+    r = rt.Route([[40, -70], [40, -10]])
+    idx = ri.RouteIndex(r)
+
+    q = idx.query(r.get_position_at(r.get_distance()/2))
+
+    assert q['leg'] == 0
+    assert abs(q['xte']) < 1e-6
+    assert abs(q['along'] - r.get_distance()/2) < 1e-6
+
+
+# Nearest distance agrees with brute force over densely sampled route
+def test_nearest_distance():
+
+    rng = np.random.default_rng(2)
+    pts = np.column_stack((np.cumsum(rng.uniform(-3, 3, 10)) + 20, np.cumsum(rng.uniform(0, 8, 10)) - 60))
+    r = rt.Route(pts)
+    idx = ri.RouteIndex(r)
+
+    s = np.linspace(0, r.get_distance(), 200001)
+    xs = idx.get_unit_vectors(r.get_position_at(s))
+
+    p = np.column_stack((rng.uniform(0, 50, 200), rng.uniform(-70, 30, 200)))
+    xp = idx.get_unit_vectors(p)
+    d = np.min(idx.get_arc(xp[:,None,:], xs[None,::20,:]), axis=1)
+
+    q = idx.query(p)
+
+    assert np.max(np.fabs(q['dist'] - np.degrees(d)*60)) < 0.1
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:40:52 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Tests of batch sight reduction!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import os
+import pytest
+import numpy as np
+
+import celestialdata as cdata
+import sightreduction as sr
+
+# data path of astronomical databases, see test_celestialdata.py
+data_path = os.environ.get('NAV_DATA_PATH', os.path.dirname(os.path.abspath(__file__)))
+cd_opts = {'offline' : True, 'iers_policy' : 'extrapolate'}
+
+
+# returns table of nn random sights, test is skipped without data
+def get_sights(nn, seed):
+
+    if not(os.path.exists(data_path + '/de421.bsp')):
+        pytest.skip('no astronomical databases in {:s} (set NAV_DATA_PATH)'.format(data_path))
+
+    rng = np.random.default_rng(seed)
+    bodies = ['sun', 'moon', 'venus', 'jupiter', 'vega', 'sirius', 'acrux', 'polaris']
+    sights = {k : [] for k in sr.sight_keys}
+    for i in range(nn):
+        sights['vessel'].append(int(rng.integers(0, 5)))
+        sights['date'].append([2024, int(rng.integers(1, 13)), int(rng.integers(1, 29))])
+        sights['time'].append([int(rng.integers(0, 24)), int(rng.integers(0, 60)), int(rng.integers(0, 60))])
+        sights['pos'].append([float(rng.uniform(-60, 60)), float(rng.uniform(-180, 180)), 0.0])
+        sights['body'].append(bodies[int(rng.integers(0, len(bodies)))])
+        sights['hs'].append(float(rng.uniform(10, 60)))
+
+    return sights
+
+
+# Reduced sights agree with single sight celestial data, in input order and
+# for any number of workers and batches
+def test_reduce_sights():
+
+    sights = get_sights(60, 4)
+    cd = cdata.CelestialData.shared(data_path, **cd_opts)
+
+    [res, report] = sr.reduce_sights(data_path, sights, workers=1, batch_size=7, **cd_opts)
+    assert [r[1] for r in report] == [7]*8 + [4]
+    assert res['vessel'] == sights['vessel'] and res['body'] == sights['body']
+
+    for i in range(60):
+        d = cd.get_celestial_data(sights['body'][i], sights['date'][i], sights['time'][i], sights['pos'][i])
+        for [k, kd] in [['hc', 'hc'], ['zn', 'wc'], ['lha', 'lha'], ['gha', 'gha'], ['dec', 'dec']]:
+            assert np.fabs(np.mod(res[k][i] - d[kd] + 180.0, 360.0) - 180.0) < 1e-9
+
+    [res2, report2] = sr.reduce_sights(data_path, sights, workers=2, batch_size=25, **cd_opts)
+    assert len(report2) == 3
+    for k in sr.result_keys:
+        assert np.max(np.fabs(np.mod(res2[k] - res[k] + 180.0, 360.0) - 180.0)) < 1e-9
+
+
+# Sights table must have all columns
+def test_missing_column():
+
+    sights = get_sights(3, 5)
+    del sights['hs']
+
+    with pytest.raises(AssertionError):
+        sr.reduce_sights(data_path, sights, workers=1, **cd_opts)
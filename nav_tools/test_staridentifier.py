@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:08:36 2026
+
+@author: aleksander.grm@fpp.uni-lj.si
+
+Tests of identification of celestial objects!
+"""
+
+import sys
+sys.path.append('../nav_tools')
+
+import os
+import pytest
+import numpy as np
+
+import celestialdata as cdata
+import staridentifier as sid
+
+# data path of astronomical databases, see test_celestialdata.py
+data_path = os.environ.get('NAV_DATA_PATH', os.path.dirname(os.path.abspath(__file__)))
+
+
+# returns CelestialData object of the data path, test is skipped without data
+def get_cd():
+
+    if not(os.path.exists(data_path + '/de421.bsp')):
+        pytest.skip('no astronomical databases in {:s} (set NAV_DATA_PATH)'.format(data_path))
+
+    return cdata.CelestialData.shared(data_path, offline=True, iers_policy='extrapolate')
+
+
+# Objects above the horizon are identified from their computed altitude and
+# azimuth, also with measurement errors and for the list of times
+def test_identify():
+
+    cd = get_cd()
+    t = [2024, 5, 3, 21, 17, 30]
+    pos = [45.5, 13.7, 0.0]
+    si = sid.StarIdentifier(cd, t)
+
+    data = [d for d in cd.get_all_celestial_objects_data(t[0:3], t[3:6], pos) if d['hc'] > 5.0]
+    names = [d['cbody'] for d in data]
+    hs = np.array([d['hc'] for d in data])
+    zn = np.array([d['wc'] for d in data])
+
+    res = si.identify(t, pos, hs, zn)
+    assert list(res['cbody'][:,0]) == names
+    assert np.max(res['dist'][:,0]) < 0.05
+    assert np.max(np.fabs(res['dec'] - np.array([d['dec'] for d in data]))) < 0.05
+    assert np.all(res['confidence'][:,0] > 0.9)
+
+    rng = np.random.default_rng(3)
+    hs1 = hs + rng.normal(0, 0.1, len(hs))
+    zn1 = zn + rng.normal(0, 0.1, len(hs))/np.cos(np.radians(hs))
+    res = si.identify([t]*len(hs), [pos]*len(hs), hs1, zn1, k=2, sigma=0.2)
+    assert np.shape(res['cbody']) == (len(hs), 2)
+    assert np.mean(res['cbody'][:,0] == np.array(names)) > 0.95
+
+    # directions far from all objects have low confidence
+    [hg, zg] = np.meshgrid(np.arange(5.0, 85.0, 5.0), np.arange(0.0, 360.0, 10.0))
+    res = si.identify(t, pos, hg.ravel(), zg.ravel(), sigma=0.2)
+    far = res['dist'][:,0] > 1.0
+    assert np.sum(far) > 100
+    assert np.all(res['confidence'][far,0] < 0.01)